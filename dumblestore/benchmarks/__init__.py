@@ -0,0 +1,110 @@
+"""
+Benchmarks for the dumblestore API. Every module is runnable from the project directory, e.g.
+
+    python -m benchmarks.ordering --movies 100000
+
+They run against a throwaway SQLite database so the development database is never touched.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+GENRES = [
+    "Action",
+    "Adventure",
+    "Animation",
+    "Comedy",
+    "Crime",
+    "Documentary",
+    "Drama",
+    "Fantasy",
+    "Horror",
+    "Musical",
+    "Mystery",
+    "Romance",
+    "Sci-Fi",
+    "Thriller",
+    "War",
+    "Western",
+]
+
+
+def setup_django(db_name=None):
+    """
+    Configures django on a fresh database and migrates it. Returns the database path
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dumblestore.settings")
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    path = db_name or os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    settings.DATABASES["default"]["NAME"] = path
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return path
+
+
+def populate_movies(count, max_genres=3, seed=42):
+    """
+    Inserts count movies with random genres using raw executemany, which is much faster than the ORM at this scale
+    """
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from movies.models import Genre, Movie
+
+    rnd = random.Random(seed)
+    Genre.objects.bulk_create(
+        [Genre(name=name) for name in GENRES], ignore_conflicts=True
+    )
+    genre_ids = dict(Genre.objects.values_list("name", "id"))
+    start = Movie.objects.count()
+
+    now = timezone.now()
+    movies, links = [], []
+    for i in range(start, start + count):
+        genres = sorted(rnd.sample(GENRES, rnd.randint(1, max_genres)))
+        title = "%s %d" % (rnd.choice(["The", "a", "Return of", "Night", "zulu"]), i)
+        movies.append((title, "movie-%d" % i, "|".join(genres), now))
+        links.append(genres)
+
+    through = Movie.genres.through._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO %s (title, slug, genre_order_index, updated_at) "
+            "VALUES (%%s, %%s, %%s, %%s)" % Movie._meta.db_table,
+            movies,
+        )
+        ids = Movie.objects.order_by("-pk").values_list("pk", flat=True)[:count]
+        rows = [
+            (movie_id, genre_ids[name])
+            for movie_id, genres in zip(reversed(list(ids)), links)
+            for name in genres
+        ]
+        cursor.executemany(
+            "INSERT INTO %s (movie_id, genre_id) VALUES (%%s, %%s)" % through, rows
+        )
+    # the raw inserts bypass the maintained counters
+    Genre.objects.recount_movies()
+
+
+def measure(func, repeat=20, warmup=2):
+    """
+    Calls func repeatedly and returns latency statistics in milliseconds
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
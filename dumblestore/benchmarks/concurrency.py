@@ -0,0 +1,139 @@
+"""
+Reads of '/api/movies/' in several processes while admins create movies in others, on the SQLite backend of
+Django with its rollback journal against the WAL profile of dumblestore.database.
+Reads are title searches, so they miss the response cache and reach the database.
+
+    python -m benchmarks.concurrency --movies 10000 --readers 3 --writers 1
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+from . import GENRES, populate_movies, setup_django
+
+# profile -> (backend, journal mode)
+PROFILES = {
+    "django default": ("django.db.backends.sqlite3", "DELETE"),
+    "dumblestore": ("dumblestore.sqlite3", "WAL"),
+}
+
+
+def worker(role, profile, duration, count, queue):
+    from django.conf import settings
+    from django.db import connections
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from movies.models import User
+    from movies.views import MovieViewSet
+
+    # a fresh connection of the backend of the profile
+    settings.DATABASES["default"]["ENGINE"] = PROFILES[profile][0]
+    del connections["default"]
+    factory = APIRequestFactory(HTTP_HOST="localhost")
+    rnd = random.Random()
+    if role == "read":
+        view = MovieViewSet.as_view({"get": "list"})
+        user = User.objects.get(email="reader@example.com")
+    else:
+        view = MovieViewSet.as_view({"post": "create"})
+        user = User.objects.get(email="admin@example.com")
+
+    latencies, errors, n = [], 0, 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        n += 1
+        if role == "read":
+            request = factory.get("/api/movies/", {"search": rnd.randrange(count)})
+        else:
+            data = {
+                "title": "Bench %d %d %d" % (rnd.randrange(10**9), time.time_ns(), n),
+                "genres": rnd.sample(GENRES, 2),
+            }
+            request = factory.post("/api/movies/", data, format="json")
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        try:
+            response = view(request)
+            ok = response.status_code in (200, 201)
+        except Exception:
+            # e.g. "database is locked"
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    queue.put((role, latencies, errors))
+
+
+def run(count, readers, writers, duration):
+    from django.conf import settings
+    from django.db import connection, connections
+    from movies.models import User
+
+    # the benchmark is about the database, not the materialized pages
+    settings.CATALOG_PAGES_MATERIALIZER = None
+    populate_movies(count)
+    User.objects.create_user(email="reader@example.com", password="bench")
+    User.objects.create_superuser(email="admin@example.com", password="bench")
+
+    context = multiprocessing.get_context("fork")
+    print(
+        "%-18s %-6s %10s %10s %10s %8s"
+        % ("profile", "role", "ops/s", "p50 ms", "p99 ms", "errors")
+    )
+    for profile, (_, journal_mode) in PROFILES.items():
+        # the journal mode is stored in the database file
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode = %s" % journal_mode)
+        connections.close_all()
+
+        queue = context.Queue()
+        roles = ["read"] * readers + ["write"] * writers
+        processes = [
+            context.Process(target=worker, args=(role, profile, duration, count, queue))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        for role in ["read", "write"]:
+            latencies = sorted(
+                latency
+                for name, found, _ in results
+                if name == role
+                for latency in found
+            )
+            errors = sum(errors for name, _, errors in results if name == role)
+            if not latencies:
+                print(
+                    "%-18s %-6s %10s %10s %10s %8d"
+                    % (profile, role, 0, "-", "-", errors)
+                )
+                continue
+            print(
+                "%-18s %-6s %10.0f %10.2f %10.2f %8d"
+                % (
+                    profile,
+                    role,
+                    len(latencies) / duration,
+                    latencies[len(latencies) // 2] * 1000,
+                    latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                    * 1000,
+                    errors,
+                )
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.movies, args.readers, args.writers, args.duration)
@@ -0,0 +1,91 @@
+"""
+Compares the genre filter with and without the (genre_id, movie_id) index on the through table,
+and with the naive genres__name join.
+
+    python -m benchmarks.genres --movies 100000
+"""
+
+import argparse
+from . import measure, populate_movies, setup_django
+
+CASES = [
+    ("Drama", ["Drama"], "all"),
+    ("Drama & Comedy", ["Drama", "Comedy"], "all"),
+    ("Drama & Comedy & War", ["Drama", "Comedy", "War"], "all"),
+    ("Drama | Comedy", ["Drama", "Comedy"], "any"),
+]
+
+
+def run(movies, repeat):
+    from django.db import connection
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+    from movies.filters import GenreFilter
+    from movies.models import Movie
+
+    populate_movies(movies)
+    page_size = 20
+
+    def filtered(names, mode):
+        params = {"genre": names, "genre_mode": mode}
+        request = Request(RequestFactory(HTTP_HOST="localhost").get("/", params))
+        return GenreFilter().filter_queryset(request, Movie.objects.all(), None)
+
+    def joined(names, mode):
+        if mode == "any":
+            return Movie.objects.filter(genres__name__in=names).distinct()
+        queryset = Movie.objects.all()
+        for name in names:
+            queryset = queryset.filter(genres__name=name)
+        return queryset
+
+    def bench():
+        results = {}
+        for label, names, mode in CASES:
+            queryset = filtered(names, mode)
+            results[label] = (
+                measure(lambda: list(queryset[:page_size]), repeat=repeat),
+                measure(queryset.count, repeat=repeat),
+            )
+        return results
+
+    indexed = bench()
+    naive = {}
+    for label, names, mode in CASES:
+        queryset = joined(names, mode)
+        naive[label] = measure(lambda: list(queryset[:page_size]), repeat=repeat)
+    with connection.cursor() as cursor:
+        cursor.execute("DROP INDEX movies_movie_genres_genre_movie_idx")
+        unindexed = bench()
+        cursor.execute(
+            "CREATE INDEX movies_movie_genres_genre_movie_idx "
+            "ON movies_movie_genres (genre_id, movie_id)"
+        )
+
+    print("%d movies, p50 of the first %d matches / count" % (movies, page_size))
+    print(
+        "%-22s %20s %20s %12s"
+        % ("genres", "indexed page/count", "no index page/count", "join page")
+    )
+    for label, _, _ in CASES:
+        print(
+            "%-22s %8.2f / %6.2f ms %8.2f / %6.2f ms %9.2f ms"
+            % (
+                label,
+                indexed[label][0]["p50_ms"],
+                indexed[label][1]["p50_ms"],
+                unindexed[label][0]["p50_ms"],
+                unindexed[label][1]["p50_ms"],
+                naive[label]["p50_ms"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.movies, args.repeat)
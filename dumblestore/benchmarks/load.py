@@ -0,0 +1,186 @@
+"""
+Load test of catalog reads over HTTP. The same uvicorn server runs the project as ASGI, with the async read path,
+and as WSGI, where every request holds one of a fixed pool of threads. Clients keep their connection open and
+wait --think-ms between requests, like slow clients.
+
+    python -m benchmarks.load --movies 10000 --concurrency 10 100 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from . import populate_movies, setup_django
+
+
+def serve(interface, db, port, without=()):
+    os.environ["DUMBLESTORE_ASYNC_READ_PATH"] = "1" if interface == "asgi" else "0"
+    setup_django(db)
+    import uvicorn
+    from django.conf import settings
+
+    # read when the application is made
+    settings.MIDDLEWARE = [name for name in settings.MIDDLEWARE if name not in without]
+
+    if interface == "asgi":
+        from dumblestore.asgi import application
+    else:
+        from dumblestore.wsgi import application
+    uvicorn.run(
+        application,
+        port=port,
+        interface="asgi3" if interface == "asgi" else "wsgi",
+        lifespan="off",
+        log_level="warning",
+        backlog=4096,
+    )
+
+
+def start_server(interface, db, port, without=()):
+    """
+    Starts a server of the application in another process, without the given middleware
+    """
+    command = [sys.executable, "-m", "benchmarks.load", "--serve", interface]
+    for name in without:
+        command += ["--without-middleware", name]
+    server = subprocess.Popen(command + ["--db", db, "--port", str(port)])
+    for _ in range(300):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("%s server did not start" % interface)
+
+
+async def fetch(reader, writer, path, token, method="GET", body=b""):
+    request = "%s %s HTTP/1.1\r\nHost: localhost\r\n" % (method, path)
+    if token:
+        request += "Authorization: Token %s\r\n" % token
+    if body:
+        request += "Content-Type: application/json\r\n"
+        request += "Content-Length: %d\r\n" % len(body)
+    writer.write((request + "\r\n").encode() + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, paths, token, deadline, think, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**20)
+    rnd = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await asyncio.wait_for(
+                fetch(reader, writer, rnd.choice(paths), token), timeout=60
+            )
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        writer.close()
+
+
+async def load(port, paths, token, concurrency, duration, think):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        *[
+            client(port, paths, token, deadline, think, latencies, errors)
+            for _ in range(concurrency)
+        ],
+        return_exceptions=True,
+    )
+    errors += [result for result in results if isinstance(result, Exception)]
+    return latencies, errors
+
+
+def run(count, concurrencies, duration, think, port):
+    db = setup_django()
+    from rest_framework.authtoken.models import Token
+    from movies.models import Movie, User
+
+    populate_movies(count)
+    user = User.objects.create_user(email="bench@example.com", password="bench")
+    token = Token.objects.create(user=user).key
+    slugs = list(Movie.objects.order_by("?").values_list("slug", flat=True)[:200])
+    paths = ["/api/movies/?page=%d" % page for page in range(1, 11)]
+    paths += ["/api/movies/?ordering=-title&page=%d" % page for page in range(1, 11)]
+    paths += ["/api/movies/%s/" % slug for slug in slugs]
+
+    print(
+        "%-6s %12s %12s %10s %10s %10s %8s"
+        % ("server", "concurrency", "think ms", "req/s", "p50 ms", "p99 ms", "errors")
+    )
+    for interface in ["wsgi", "asgi"]:
+        server = start_server(interface, db, port)
+        try:
+            # fills the response cache, the token cache and the materialized pages
+            asyncio.run(load(port, paths, token, 1, 2, 0))
+            time.sleep(1)
+            asyncio.run(load(port, paths, token, 1, 2, 0))
+            for concurrency in concurrencies:
+                latencies, errors = asyncio.run(
+                    load(port, paths, token, concurrency, duration, think)
+                )
+                latencies.sort()
+                print(
+                    "%-6s %12d %12d %10.0f %10.2f %10.2f %8d"
+                    % (
+                        interface,
+                        concurrency,
+                        think * 1000,
+                        len(latencies) / duration,
+                        statistics.median(latencies) * 1000 if latencies else 0,
+                        (
+                            latencies[int(len(latencies) * 0.99)] * 1000
+                            if latencies
+                            else 0
+                        ),
+                        len(errors),
+                    ),
+                    flush=True,
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--think-ms", type=float, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", choices=["asgi", "wsgi"], help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--without-middleware", action="append", default=[], help=argparse.SUPPRESS
+    )
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.db, args.port, args.without_middleware)
+    else:
+        run(
+            args.movies,
+            args.concurrency,
+            args.duration,
+            args.think_ms / 1000,
+            args.port,
+        )
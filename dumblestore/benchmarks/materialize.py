@@ -0,0 +1,70 @@
+"""
+Compares serving the unfiltered movie list from the ORM with serving it from materialized pages,
+and measures what a full render and the render after a single write cost.
+
+    python -m benchmarks.materialize --movies 10000
+"""
+
+import argparse
+from . import measure, populate_movies, setup_django
+
+
+def run(count, repeat):
+    from django.core.cache import cache
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from movies.materialize import materializer
+    from movies.models import Movie, User
+    from movies.views import MovieViewSet
+
+    populate_movies(count)
+    user = User.objects.create_user(email="bench@example.com", password="bench")
+    view = MovieViewSet.as_view({"get": "list"})
+    factory = APIRequestFactory(HTTP_HOST="localhost")
+
+    def get(query):
+        request = factory.get("/api/movies/" + query)
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        return response
+
+    print("%-40s %10s %10s" % ("", "p50 ms", "p99 ms"))
+    with override_settings(CATALOG_PAGES_MATERIALIZER="inline"):
+        stats = measure(lambda: materializer.process([None]), repeat=3, warmup=0)
+        print("%-40s %10.2f %10.2f" % ("full render", stats["p50_ms"], stats["p99_ms"]))
+
+        movie = Movie.objects.order_by("pk")[count // 2]
+        titles = iter(range(repeat * 2 + 10))
+
+        def update():
+            movie.title = "renamed %d" % next(titles)
+            movie.save()
+
+        stats = measure(update, repeat=repeat)
+        print(
+            "%-40s %10.2f %10.2f"
+            % ("save + affected pages", stats["p50_ms"], stats["p99_ms"])
+        )
+
+        for query in ["?page=1", "?ordering=-title&page=%d" % (count // 40 or 1)]:
+            # the response cache would hide the difference
+            with override_settings(CATALOG_PAGES_MATERIALIZER=None):
+                orm = measure(lambda: (cache.clear(), get(query)), repeat=repeat)
+                materializer.process([None])
+            materialized = measure(lambda: get(query), repeat=repeat)
+            for name, stats in [("orm", orm), ("materialized", materialized)]:
+                print(
+                    "%-40s %10.2f %10.2f"
+                    % ("%s %s" % (query, name), stats["p50_ms"], stats["p99_ms"])
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.movies, args.repeat)
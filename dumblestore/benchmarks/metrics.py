@@ -0,0 +1,99 @@
+"""
+Cost of dumblestore.metrics.MetricsMiddleware on a hot, cached movie list page through the whole middleware stack,
+in process and over HTTP on a local uvicorn server running the ASGI application with --concurrency clients.
+
+    python -m benchmarks.metrics
+"""
+
+import argparse
+import asyncio
+from . import measure, populate_movies, setup_django
+from .load import load, start_server
+
+MIDDLEWARE = "dumblestore.metrics.MetricsMiddleware"
+
+
+def run_in_process(token, repeat):
+    from django.conf import settings
+    from django.test import Client, override_settings
+
+    client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION="Token " + token)
+    without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+
+    print("%-24s %10s %10s" % ("in process", "p50 ms", "p99 ms"))
+    for profile, middleware in [("without", without), ("with", settings.MIDDLEWARE)]:
+        with override_settings(MIDDLEWARE=middleware):
+
+            def get():
+                response = client.get("/api/movies/?page=2")
+                assert response.status_code == 200, response.status_code
+
+            stats = measure(get, repeat=repeat, warmup=20)
+            print(
+                "%-24s %10.3f %10.3f"
+                % ("%s metrics" % profile, stats["p50_ms"], stats["p99_ms"])
+            )
+
+
+def run_asgi(db, token, concurrencies, duration, port):
+    paths = ["/api/movies/?page=2"]
+    print(
+        "%-24s %12s %10s %10s %10s"
+        % ("asgi", "concurrency", "req/s", "p50 ms", "p99 ms")
+    )
+    for profile, without in [("without", [MIDDLEWARE]), ("with", [])]:
+        server = start_server("asgi", db, port, without)
+        try:
+            # fills the response cache and the token cache
+            asyncio.run(load(port, paths, token, 1, 1, 0))
+            for concurrency in concurrencies:
+                latencies, errors = asyncio.run(
+                    load(port, paths, token, concurrency, duration, 0)
+                )
+                assert not errors, errors[:5]
+                latencies.sort()
+                print(
+                    "%-24s %12d %10.0f %10.3f %10.3f"
+                    % (
+                        "%s metrics" % profile,
+                        concurrency,
+                        len(latencies) / duration,
+                        latencies[len(latencies) // 2] * 1000,
+                        latencies[int(len(latencies) * 0.99)] * 1000,
+                    ),
+                    flush=True,
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def run(db, count, repeat, concurrencies, duration, port):
+    from rest_framework.authtoken.models import Token
+    from movies.models import User
+
+    populate_movies(count)
+    user = User.objects.create_user(email="bench@example.com", password="bench")
+    token = Token.objects.create(user=user).key
+    run_in_process(token, repeat)
+    if concurrencies:
+        run_asgi(db, token, concurrencies, duration, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="*",
+        default=[1, 10],
+        help="HTTP clients, none skips the server",
+    )
+    parser.add_argument("--duration", type=float, default=5, help="seconds per run")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    db = setup_django(args.db)
+    run(db, args.movies, args.repeat, args.concurrency, args.duration, args.port)
@@ -0,0 +1,102 @@
+"""
+Compares the sorted movie list with and without the functional Lower() indexes.
+
+    python -m benchmarks.ordering --movies 100000
+"""
+
+import argparse
+import json
+from base64 import urlsafe_b64encode
+from . import measure, populate_movies, setup_django
+
+ORDERINGS = ["title", "-title", "genres", "-genres"]
+
+
+def run(movies, deep_page, repeat):
+    from django.db import connection
+    from django.db.models.functions import Lower
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+    from movies.filters import GenreOrderingFilter, get_ordering
+    from movies.models import Movie
+    from movies.pagination import KeysetPagination
+
+    populate_movies(movies)
+    page_size = KeysetPagination.page_size
+    offset = deep_page * page_size
+
+    def request(**params):
+        return Request(RequestFactory(HTTP_HOST="localhost").get("/", params))
+
+    def sorted_queryset(ordering):
+        return GenreOrderingFilter().filter_queryset(
+            request(ordering=ordering), Movie.objects.all(), None
+        )
+
+    def deep_cursor(ordering):
+        # the cursor a client walking the 'next' links would hold at the deep page
+        field, _ = get_ordering(request(ordering=ordering))
+        row = sorted_queryset(ordering).annotate(sort_key=Lower(field))[offset - 1]
+        position = json.dumps([row.sort_key, row.pk, False]).encode()
+        return urlsafe_b64encode(position).decode()
+
+    def keyset_page(ordering, cursor):
+        KeysetPagination().paginate_queryset(
+            Movie.objects.all(), request(ordering=ordering, cursor=cursor)
+        )
+
+    def bench():
+        results = {}
+        for ordering in ORDERINGS:
+            queryset = sorted_queryset(ordering)
+            cursor = deep_cursor(ordering)
+            results[ordering] = {
+                "first page": measure(
+                    lambda: list(queryset[:page_size]), repeat=repeat
+                ),
+                "page %d"
+                % deep_page: measure(
+                    lambda: list(queryset[offset : offset + page_size]),
+                    repeat=repeat,
+                ),
+                "cursor %d"
+                % deep_page: measure(
+                    lambda: keyset_page(ordering, cursor), repeat=repeat
+                ),
+            }
+        with connection.cursor() as cursor:
+            sql, params = sorted_queryset("genres")[:page_size].query.sql_with_params()
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " / ".join(row[-1] for row in cursor.fetchall())
+        return results, plan
+
+    indexed, indexed_plan = bench()
+    with connection.schema_editor() as editor:
+        for index in Movie._meta.indexes:
+            editor.remove_index(Movie, index)
+    unindexed, unindexed_plan = bench()
+    with connection.schema_editor() as editor:
+        for index in Movie._meta.indexes:
+            editor.add_index(Movie, index)
+
+    print("%d movies, %d rows per page" % (movies, page_size))
+    print("plan with indexes:    %s" % indexed_plan)
+    print("plan without indexes: %s" % unindexed_plan)
+    print("%-9s %-12s %14s %14s" % ("ordering", "page", "indexed p50", "no index p50"))
+    for ordering in ORDERINGS:
+        for page, stats in indexed[ordering].items():
+            print(
+                "%-9s %-12s %11.3f ms %11.3f ms"
+                % (ordering, page, stats["p50_ms"], unindexed[ordering][page]["p50_ms"])
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--deep-page", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.movies, args.deep_page, args.repeat)
@@ -0,0 +1,71 @@
+"""
+Compares the indexed title search and prefix filters with the LIKE scans they replace.
+
+    python -m benchmarks.search --movies 100000
+"""
+
+import argparse
+from . import measure, populate_movies, setup_django
+
+# (label, indexed query parameters, equivalent unindexed filter)
+CASES = [
+    ("search 'night 4242'", {"search": "night 4242"}, "search"),
+    ("search 'zul'", {"search": "zul"}, "search"),
+    ("prefix 'return of 9'", {"title_prefix": "return of 9"}, "prefix"),
+    ("prefix 'zulu 77'", {"title_prefix": "zulu 77"}, "prefix"),
+]
+
+
+def run(movies, repeat):
+    from django.db import connection
+    from django.db.models import Q
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+    from movies.filters import MovieSearchFilter
+    from movies.models import Movie
+
+    populate_movies(movies)
+    page_size = 20
+
+    def indexed(params):
+        request = Request(RequestFactory(HTTP_HOST="localhost").get("/", params))
+        return MovieSearchFilter().filter_queryset(request, Movie.objects.all(), None)
+
+    def scan(params, kind):
+        if kind == "prefix":
+            return Movie.objects.filter(title__istartswith=params["title_prefix"])
+        query = Q()
+        for term in params["search"].split():
+            query &= Q(title__icontains=term)
+        return Movie.objects.filter(query)
+
+    print("%d movies, first %d matches" % (movies, page_size))
+    print("%-22s %8s %14s %14s" % ("query", "matches", "indexed p50", "LIKE p50"))
+    for label, params, kind in CASES:
+        fast, slow = indexed(params), scan(params, kind)
+        matches = fast.count()
+        fast_stats = measure(lambda: list(fast[:page_size]), repeat=repeat)
+        slow_stats = measure(lambda: list(slow[:page_size]), repeat=repeat)
+        print(
+            "%-22s %8d %11.3f ms %11.3f ms"
+            % (label, matches, fast_stats["p50_ms"], slow_stats["p50_ms"])
+        )
+
+    with connection.cursor() as cursor:
+        for label, params, _ in CASES[::2]:
+            sql, sql_params = indexed(params).query.sql_with_params()
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, sql_params)
+            print(
+                "plan %s: %s"
+                % (label, " / ".join(row[-1] for row in cursor.fetchall()))
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.movies, args.repeat)
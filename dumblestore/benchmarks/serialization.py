@@ -0,0 +1,76 @@
+"""
+Compares the field by field MovieSerializer list and JSONRenderer with MovieListSerializer and FastJSONRenderer.
+
+    python -m benchmarks.serialization --rows 20 1000
+"""
+
+import argparse
+from . import measure, populate_movies, setup_django
+
+
+def run(sizes, repeat):
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.serializers import ListSerializer
+    from movies.models import Movie
+    from movies.renderers import FastJSONRenderer
+    from movies.serializers import MovieListSerializer, MovieSerializer
+
+    populate_movies(max(sizes))
+    request = Request(RequestFactory(HTTP_HOST="localhost").get("/api/movies/"))
+    context = {"request": request, "format": None}
+    paths = {
+        "field by field": (
+            Movie.objects.prefetch_related("genres"),
+            ListSerializer,
+            JSONRenderer,
+        ),
+        "fast path": (Movie.objects.all(), MovieListSerializer, FastJSONRenderer),
+    }
+
+    print(
+        "%-8s %-15s %14s %14s %14s"
+        % ("rows", "path", "load+serialize", "render", "total")
+    )
+    for size in sizes:
+        results = {}
+        for name, (queryset, list_serializer_class, renderer_class) in paths.items():
+            renderer = renderer_class()
+
+            def serialize():
+                # includes the page query and the genre query of either path
+                serializer = list_serializer_class(
+                    child=MovieSerializer(), context=context
+                )
+                return serializer.to_representation(queryset[:size])
+
+            data = serialize()
+            serialize_stats = measure(serialize, repeat=repeat)
+            render_stats = measure(lambda: renderer.render(data), repeat=repeat)
+            results[name] = renderer.render(data)
+            per_row = lambda stats: stats["p50_ms"] * 1000 / size
+            print(
+                "%-8d %-15s %9.2f us/row %9.2f us/row %9.2f us/row"
+                % (
+                    size,
+                    name,
+                    per_row(serialize_stats),
+                    per_row(render_stats),
+                    per_row(serialize_stats) + per_row(render_stats),
+                )
+            )
+        print(
+            "%-8d identical output: %s"
+            % (size, results["field by field"] == results["fast path"])
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    setup_django(args.db)
+    run(args.rows, args.repeat)
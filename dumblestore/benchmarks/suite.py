@@ -0,0 +1,357 @@
+"""
+Throughput and latency of the main endpoints on catalogs of growing size, as JSON to compare across commits.
+
+Every size grows the same catalog: the first movies come from MovieWithManyGenresFactory.create_bulk,
+the rest from the raw inserts of populate_movies, users from RandomUserFactory and movies.bulk.bulk_create_users.
+Each endpoint is driven in process through the whole middleware stack, with warm and cold caches,
+then over HTTP on a local uvicorn server with every --concurrency.
+
+    python -m benchmarks.suite --movies 1000 100000 1000000 --output results.json
+    python -m benchmarks.suite --movies 1000 --compare results.json
+
+Materialized pages are off unless --materialized, rendering them at 1M movies takes minutes.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from . import populate_movies, setup_django
+from .load import fetch, start_server
+
+PASSWORD = "bench-password"
+# movies made by the factory, with slugs and genre counts like the API makes them
+FACTORY_MOVIES = 10000
+# users whose tokens the clients take turns with
+USERS = 50
+
+# columns the results are matched on by --compare
+KEY = ("movies", "mode", "endpoint", "cache", "concurrency")
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_catalog(count):
+    """
+    Grows the catalog to count movies. Returns (email, tokens, slugs, last page)
+    """
+    import factory
+    from django.core.cache import cache
+    from rest_framework.authtoken.models import Token
+    from movies.bulk import bulk_create_users
+    from movies.models import Movie, User
+    from movies.tests.factories import MovieWithManyGenresFactory, RandomUserFactory
+
+    existing = Movie.objects.count()
+    if existing == 0:
+        populate_movies(0)
+        MovieWithManyGenresFactory.create_bulk(
+            min(FACTORY_MOVIES, count), genre_count=2
+        )
+        existing = Movie.objects.count()
+    if count > existing:
+        populate_movies(count - existing)
+    # the raw inserts do not invalidate anything
+    cache.clear()
+
+    email = "bench@example.com"
+    if not User.objects.filter(email=email).exists():
+        bulk_create_users(
+            [
+                {
+                    "email": email,
+                    "first_name": "Bench",
+                    "last_name": "Mark",
+                    "password": PASSWORD,
+                }
+            ]
+        )
+        users = RandomUserFactory.create_batch(
+            USERS, email=factory.Sequence(lambda n: "bench%d@example.com" % n)
+        )
+        Token.objects.bulk_create(
+            [Token(user=user, key=Token.generate_key()) for user in users]
+        )
+    tokens = list(Token.objects.values_list("key", flat=True))
+    slugs = list(Movie.objects.order_by("?").values_list("slug", flat=True)[:200])
+    last_page = max(1, -(-count // 20))
+    return email, tokens, slugs, last_page
+
+
+def endpoints(email, slugs, last_page):
+    """
+    Returns {endpoint: [(method, path, body)]}, every request picks one of them
+    """
+    deep = range(max(1, last_page - 9), last_page + 1)
+    login = json.dumps({"username": email, "password": PASSWORD}).encode()
+    return {
+        "movie-list": [("GET", "/api/movies/?page=%d" % p, b"") for p in range(1, 11)],
+        "movie-list-deep": [("GET", "/api/movies/?page=%d" % p, b"") for p in deep],
+        "movie-ordering": [
+            ("GET", "/api/movies/?ordering=%s&page=%d" % (ordering, p), b"")
+            for ordering in ["-title", "genres", "-genres"]
+            for p in range(1, 4)
+        ],
+        "movie-detail": [("GET", "/api/movies/%s/" % slug, b"") for slug in slugs],
+        "user-me": [("GET", "/api/users/me/", b"")],
+        "token-auth": [("POST", "/api-token-auth/", login)],
+    }
+
+
+def summary(latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / duration, 1),
+        "p50_ms": (
+            round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None
+        ),
+        "p99_ms": (
+            round(
+                latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3
+            )
+            if latencies
+            else None
+        ),
+    }
+
+
+def run_in_process(requests, tokens, duration, cold):
+    """
+    Sends requests one at a time through django.test.Client. Cold runs clear every cache tier before each request
+    """
+    from django.core.cache import cache
+    from django.test import Client
+    from movies.authentication import CachedTokenAuthentication
+    from movies.cache import catalog_cache
+
+    client = Client(HTTP_HOST="localhost")
+    rnd = random.Random(42)
+    latencies, errors, spent = [], 0, 0
+    while spent < duration:
+        method, path, body = rnd.choice(requests)
+        headers = {"HTTP_AUTHORIZATION": "Token " + rnd.choice(tokens)}
+        if cold:
+            cache.clear()
+            catalog_cache.local.clear()
+            CachedTokenAuthentication.token_cache.local.clear()
+        start = time.perf_counter()
+        if method == "GET":
+            response = client.get(path, **headers)
+        else:
+            response = client.post(path, body, content_type="application/json")
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        if response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    return summary(latencies, errors, spent)
+
+
+async def http_client(port, requests, tokens, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**20)
+    rnd = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            method, path, body = rnd.choice(requests)
+            token = rnd.choice(tokens) if method == "GET" else None
+            start = time.perf_counter()
+            status = await asyncio.wait_for(
+                fetch(reader, writer, path, token, method, body), timeout=60
+            )
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_http(port, requests, tokens, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        *[
+            http_client(port, requests, tokens, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ],
+        return_exceptions=True,
+    )
+    errors += [result for result in results if isinstance(result, Exception)]
+    return summary(latencies, len(errors), duration)
+
+
+def environment():
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "cache": settings.CACHES["default"]["BACKEND"],
+        "materialized": bool(settings.CATALOG_PAGES_MATERIALIZER),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(db, sizes, concurrencies, duration, interface, port, materialized):
+    from django.test import override_settings
+    from movies.materialize import materializer
+
+    results = []
+
+    def add(**result):
+        results.append(result)
+        log(
+            "%(movies)8d %(mode)-10s %(endpoint)-16s %(cache)-5s c=%(concurrency)-4d "
+            "%(req_per_s)8.1f req/s  p50 %(p50_ms)s ms  p99 %(p99_ms)s ms  errors %(errors)d"
+            % result
+        )
+
+    for count in sorted(sizes):
+        start = time.perf_counter()
+        email, tokens, slugs, last_page = build_catalog(count)
+        if materialized:
+            materializer.process([None])
+        log("%d movies ready in %.1fs" % (count, time.perf_counter() - start))
+        targets = endpoints(email, slugs, last_page)
+
+        with override_settings(
+            CATALOG_PAGES_MATERIALIZER="inline" if materialized else None
+        ):
+            for endpoint, requests in targets.items():
+                # logging in hashes the password, the cache does not change it
+                caches = ["warm"] if endpoint == "token-auth" else ["warm", "cold"]
+                for state in caches:
+                    if state == "warm":
+                        run_in_process(requests, tokens, 1, cold=False)
+                    stats = run_in_process(
+                        requests, tokens, duration, cold=state == "cold"
+                    )
+                    add(
+                        movies=count,
+                        mode="in-process",
+                        endpoint=endpoint,
+                        cache=state,
+                        concurrency=1,
+                        **stats,
+                    )
+
+        if not concurrencies:
+            continue
+        server = start_server(interface, db, port)
+        try:
+            for endpoint, requests in targets.items():
+                # fills the caches of the server
+                asyncio.run(run_http(port, requests, tokens, 1, 1))
+                for concurrency in concurrencies:
+                    stats = asyncio.run(
+                        run_http(port, requests, tokens, concurrency, duration)
+                    )
+                    add(
+                        movies=count,
+                        mode="http-" + interface,
+                        endpoint=endpoint,
+                        cache="warm",
+                        concurrency=concurrency,
+                        **stats,
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def compare(results, baseline):
+    """
+    Prints the change of throughput and p99 latency against the results of an earlier run
+    """
+    before = {tuple(row[name] for name in KEY): row for row in baseline["results"]}
+    print(
+        "%-48s %12s %12s"
+        % ("compared with %s" % baseline["environment"]["commit"], "req/s", "p99")
+    )
+    for row in results:
+        old = before.get(tuple(row[name] for name in KEY))
+        if old is None or not old["req_per_s"] or not old["p99_ms"]:
+            continue
+        print(
+            "%-48s %+11.1f%% %+11.1f%%"
+            % (
+                " ".join(str(row[name]) for name in KEY),
+                (row["req_per_s"] / old["req_per_s"] - 1) * 100,
+                ((row["p99_ms"] or 0) / old["p99_ms"] - 1) * 100,
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--movies", type=int, nargs="+", default=[1000, 100000, 1000000]
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="*",
+        default=[1, 10, 50],
+        help="HTTP clients, none skips the server",
+    )
+    parser.add_argument("--duration", type=float, default=5, help="seconds per run")
+    parser.add_argument("--interface", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--materialized", action="store_true")
+    parser.add_argument("--output", help="JSON file, stdout by default")
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+
+    # the server runs in another process and reads the setting from the environment
+    os.environ["CATALOG_PAGES_MATERIALIZER"] = "inline" if args.materialized else ""
+    db = setup_django(args.db)
+    report = {
+        "environment": environment(),
+        "results": run(
+            db,
+            args.movies,
+            args.concurrency,
+            args.duration,
+            args.interface,
+            args.port,
+            args.materialized,
+        ),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report["results"], json.load(f))
@@ -0,0 +1,72 @@
+"""
+Hot catalog reads with and without the in-process tier of movies.cache.TwoTierCache, authenticated with a token.
+The shared cache is an in-process Redis by default, which has no network round trip,
+pass --cache redis://host:6379/0 to measure against a real server.
+
+    python -m benchmarks.tiers --movies 1000 --cache redis://localhost:6379/0
+"""
+
+import argparse
+import os
+from . import measure, populate_movies, setup_django
+
+
+def run(count, repeat):
+    from django.core.cache import cache
+    from django.test import override_settings
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+    from movies.authentication import CachedTokenAuthentication
+    from movies.cache import catalog_cache
+    from movies.models import Movie, User
+    from movies.views import MovieViewSet
+
+    populate_movies(count)
+    user = User.objects.create_user(email="bench@example.com", password="bench")
+    token = Token.objects.create(user=user)
+    slug = Movie.objects.order_by("pk").values_list("slug", flat=True)[count // 2]
+    factory = APIRequestFactory(
+        HTTP_HOST="localhost", HTTP_AUTHORIZATION="Token " + token.key
+    )
+    views = {
+        "list": (MovieViewSet.as_view({"get": "list"}), "/api/movies/", {}),
+        "detail": (
+            MovieViewSet.as_view({"get": "retrieve"}),
+            "/api/movies/%s/" % slug,
+            {"slug": slug},
+        ),
+    }
+    tiers = [catalog_cache.local, CachedTokenAuthentication.token_cache.local]
+
+    print("%-24s %10s %10s" % ("", "p50 ms", "p99 ms"))
+    for profile, max_size in [("shared cache only", 0), ("two tiers", 1000)]:
+        for tier in tiers:
+            tier.max_size = max_size
+            tier.clear()
+        cache.clear()
+        # the interval of a production worker, the shared cache is checked once a second
+        with override_settings(LOCAL_CACHE_CHECK_INTERVAL=1):
+            for name, (view, url, kwargs) in views.items():
+
+                def get():
+                    response = view(factory.get(url), **kwargs)
+                    response.render()
+                    assert response.status_code == 200, response.status_code
+
+                stats = measure(get, repeat=repeat)
+                print(
+                    "%-24s %10.3f %10.3f"
+                    % ("%s %s" % (name, profile), stats["p50_ms"], stats["p99_ms"])
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--cache", default="fakeredis://", help="CACHE_URL")
+    parser.add_argument("--db", help="database file, a temporary one by default")
+    args = parser.parse_args()
+    os.environ["CACHE_URL"] = args.cache
+    setup_django(args.db)
+    run(args.movies, args.repeat)
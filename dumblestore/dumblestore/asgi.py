@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dumblestore.settings')
+os.environ.setdefault('DUMBLESTORE_ASYNC_READ_PATH', '1')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # runserver serves the static files of the admin and the browsable API in development
+    application = ASGIStaticFilesHandler(application)
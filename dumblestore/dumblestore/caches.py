@@ -0,0 +1,76 @@
+"""
+Cache configuration from the environment. Every worker has to share the cache: catalog versions, response entries,
+materialized pages and resolved tokens are written by one worker and read by all of them.
+
+    CACHE_URL    redis://host:6379/0        Redis, shared by every worker of every server
+                 file:///var/tmp/dumblestore files, shared by the workers of one server
+                 db://dumblestore_cache      a table of the default database, create it with createcachetable
+                 fakeredis://                an in-process Redis for tests, needs fakeredis
+                 locmem://                   per process, the default for development
+
+LocMemCache is only right for a single process, with several workers each of them keeps its own
+catalog versions and never sees the writes made by the others.
+"""
+
+import os
+from urllib.parse import urlparse
+
+# most entries are small and versioned, the backends cull the oldest ones past this
+MAX_ENTRIES = 100000
+
+
+def cache_config(url=None, environ=os.environ):
+    """
+    Returns the default cache settings for url, CACHE_URL by default
+    """
+    if url is None:
+        url = environ.get("CACHE_URL", "locmem://")
+    parsed = urlparse(url)
+    config = {"KEY_PREFIX": "dumblestore"}
+
+    if parsed.scheme in ("redis", "rediss"):
+        config["BACKEND"] = "django.core.cache.backends.redis.RedisCache"
+        config["LOCATION"] = url
+    elif parsed.scheme == "fakeredis":
+        config["BACKEND"] = "django.core.cache.backends.redis.RedisCache"
+        config["LOCATION"] = "redis://localhost:6379/0"
+        config["OPTIONS"] = {"pool_class": "dumblestore.caches.FakeRedisPool"}
+    elif parsed.scheme == "file":
+        config["BACKEND"] = "django.core.cache.backends.filebased.FileBasedCache"
+        config["LOCATION"] = parsed.path
+        config["OPTIONS"] = {"MAX_ENTRIES": MAX_ENTRIES}
+    elif parsed.scheme == "db":
+        config["BACKEND"] = "django.core.cache.backends.db.DatabaseCache"
+        config["LOCATION"] = parsed.netloc or parsed.path.lstrip("/")
+        config["OPTIONS"] = {"MAX_ENTRIES": MAX_ENTRIES}
+    elif parsed.scheme == "locmem":
+        config["BACKEND"] = "django.core.cache.backends.locmem.LocMemCache"
+        config["LOCATION"] = parsed.netloc
+        config["OPTIONS"] = {"MAX_ENTRIES": MAX_ENTRIES}
+    else:
+        raise ValueError("Unsupported CACHE_URL scheme %r" % parsed.scheme)
+    return config
+
+
+try:
+    import fakeredis
+    import redis
+except ImportError:
+    pass
+else:
+
+    class FakeRedisPool(redis.ConnectionPool):
+        """
+        Connects to an in-process Redis server, one per process, so tests run on the Redis backend
+        """
+
+        server = fakeredis.FakeServer()
+
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            # fakeredis parses the protocol itself
+            kwargs.pop("parser_class", None)
+            kwargs["db"] = kwargs.get("db") or 0
+            return cls(
+                connection_class=fakeredis.FakeConnection, server=cls.server, **kwargs
+            )
@@ -0,0 +1,338 @@
+"""
+Request metrics. MetricsMiddleware records the latency of every request by route, its database queries and
+their time, the hits and misses of the catalog caches and the size of the response. Each response gets them
+in a Server-Timing header, browsers show it next to the request, and the totals are served on '/metrics'
+in the Prometheus text format.
+
+Code in the request marks its parts with timed(), e.g. authentication or rendering, they are reported
+the same way. Totals are kept per process: with several workers, scrape each of them.
+
+    METRICS_TOKEN    '/metrics' requires "Authorization: Bearer <METRICS_TOKEN>", it answers 404 while unset
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+from django.utils.crypto import constant_time_compare
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# the metrics of the request being handled
+_current = ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """
+    Counters and histograms of one process, by name and labels
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.help = {}
+
+    def describe(self, name, kind, text):
+        self.help[name] = (kind, text)
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        series = defaultdict(list)
+        with self._lock:
+            for (name, labels), value in self.counters.items():
+                series[name].append("%s%s %s" % (name, format_labels(labels), value))
+            for (name, labels), histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets + ("+Inf",), histogram.counts
+                ):
+                    cumulative += count
+                    series[name].append(
+                        "%s_bucket%s %d"
+                        % (
+                            name,
+                            format_labels(labels + (("le", str(bound)),)),
+                            cumulative,
+                        )
+                    )
+                series[name].append(
+                    "%s_sum%s %s" % (name, format_labels(labels), histogram.sum)
+                )
+                series[name].append(
+                    "%s_count%s %d" % (name, format_labels(labels), cumulative)
+                )
+        lines = []
+        for name in sorted(series):
+            kind, text = self.help.get(name, ("untyped", ""))
+            lines.append("# HELP %s %s" % (name, text))
+            lines.append("# TYPE %s %s" % (name, kind))
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for name, value in labels
+    )
+
+
+registry = Registry()
+registry.describe(
+    "dumblestore_request_duration_seconds", "histogram", "Request latency by route"
+)
+registry.describe(
+    "dumblestore_response_size_bytes", "histogram", "Response body size by route"
+)
+registry.describe(
+    "dumblestore_responses_total", "counter", "Responses by route and status code"
+)
+registry.describe(
+    "dumblestore_db_queries_total", "counter", "Database queries made by route"
+)
+registry.describe(
+    "dumblestore_db_query_seconds_total",
+    "counter",
+    "Time spent in database queries by route",
+)
+registry.describe(
+    "dumblestore_cache_reads_total",
+    "counter",
+    "Catalog cache reads by route, tier (local or shared) and result",
+)
+registry.describe(
+    "dumblestore_phase_seconds_total",
+    "counter",
+    "Time spent in the parts of the request marked with timed(), by route",
+)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0
+        self.cache_reads = defaultdict(int)
+        self.phases = defaultdict(float)
+
+    def execute(self, execute, sql, params, many, context):
+        # a database execute_wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+    def server_timing(self, duration):
+        """
+        Returns the Server-Timing header value, durations in milliseconds
+        """
+        timings = [
+            "total;dur=%.1f" % (duration * 1000),
+            'db;dur=%.1f;desc="%d queries"' % (self.query_time * 1000, self.queries),
+        ]
+        if self.cache_reads:
+            hits = sum(n for (_, hit), n in self.cache_reads.items() if hit)
+            misses = sum(n for (_, hit), n in self.cache_reads.items() if not hit)
+            timings.append('cache;desc="%d hits / %d misses"' % (hits, misses))
+        timings.extend(
+            "%s;dur=%.1f" % (phase, seconds * 1000)
+            for phase, seconds in self.phases.items()
+        )
+        return ", ".join(timings)
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Database execute_wrapper of every connection, counts the query for the request in progress.
+    Sync views run in a thread with their own connection under ASGI, the request is found through the context
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # connect() runs again for every reconnect of the same connection
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Adds the time spent in the block to phase of the current request
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[phase] += time.perf_counter() - start
+
+
+def cache_read(tier, hit):
+    """
+    Records a read of a catalog cache tier for the current request
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_reads[tier, hit] += 1
+
+
+class MetricsMiddleware:
+    """
+    Records the metrics of every request and adds the Server-Timing header to its response.
+    Goes first, so its latency covers the other middleware. Sync and async, under ASGI it stays on the event loop
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            # Django would call the sync hook in a thread
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.view_name if match is not None else "unmatched"
+        record(route, request.method, response, duration, metrics)
+        response["Server-Timing"] = metrics.server_timing(duration)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.phases["render"] += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+
+def record(route, method, response, duration, metrics):
+    labels = (("route", route),)
+    registry.observe(
+        "dumblestore_request_duration_seconds",
+        labels + (("method", method),),
+        duration,
+        LATENCY_BUCKETS,
+    )
+    registry.inc(
+        "dumblestore_responses_total",
+        labels + (("method", method), ("status", response.status_code)),
+    )
+    if not response.streaming:
+        registry.observe(
+            "dumblestore_response_size_bytes",
+            labels,
+            len(response.content),
+            SIZE_BUCKETS,
+        )
+    registry.inc("dumblestore_db_queries_total", labels, metrics.queries)
+    registry.inc("dumblestore_db_query_seconds_total", labels, metrics.query_time)
+    for (tier, hit), count in metrics.cache_reads.items():
+        result = "hit" if hit else "miss"
+        registry.inc(
+            "dumblestore_cache_reads_total",
+            labels + (("tier", tier), ("result", result)),
+            count,
+        )
+    for phase, seconds in metrics.phases.items():
+        registry.inc(
+            "dumblestore_phase_seconds_total", labels + (("phase", phase),), seconds
+        )
+
+
+def metrics_view(request):
+    """
+    Serves the metrics of this process to Prometheus. Traffic and latency by route are not public,
+    without a METRICS_TOKEN the endpoint does not exist
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseNotFound()
+    if not constant_time_compare(
+        request.META.get("HTTP_AUTHORIZATION", ""), "Bearer " + settings.METRICS_TOKEN
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
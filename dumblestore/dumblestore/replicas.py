@@ -0,0 +1,181 @@
+"""
+Read replicas. Reads of GET, HEAD and OPTIONS requests go to a random replica of DATABASE_REPLICAS,
+everything else reads and writes the primary: other requests, management commands and background threads.
+
+Replicas lag behind the primary, so after a write the client that made it reads the primary for
+DATABASE_REPLICA_LAG seconds (read-your-writes). Clients are told apart by their Authorization header,
+their session, the session or token the write hands out (a login) and the address DATABASE_REPLICA_CLIENT_IP_HEADER,
+set by a trusted proxy, gives. The address of the peer is not used, behind Heroku's router or a NAT many clients
+share it. A write to the catalog moves every client to the primary for the same time, so no response cache entry
+of the new catalog version is filled from a replica that has not seen it yet. Tokens missing on a replica are
+looked up on the primary, see CachedTokenAuthentication.
+"""
+
+import asyncio
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY = "replicas.pin.%s"
+CATALOG = "catalog"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# the Authorization scheme of the tokens /api-token-auth/ issues, see TokenAuthentication
+TOKEN_KEYWORD = "Token"
+
+# set by ReplicaMiddleware for the requests that may read a replica
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def client_keys(request):
+    """
+    Returns the pin keys of the client making the request
+    """
+    return pin_keys(
+        [
+            request.META.get("HTTP_AUTHORIZATION"),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME),
+            client_ip(request),
+        ]
+    )
+
+
+def issued_keys(response):
+    """
+    Returns the pin keys of the session or the token a response hands to the client, e.g. of a login.
+    The client sends them with its next requests, not with the one that wrote them
+    """
+    values = []
+    session = response.cookies.get(settings.SESSION_COOKIE_NAME)
+    if session is not None:
+        values.append(session.value)
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and isinstance(data.get("token"), str):
+        values.append("%s %s" % (TOKEN_KEYWORD, data["token"]))
+    return pin_keys(values)
+
+
+def pin_keys(values):
+    return [
+        PIN_KEY % hashlib.sha256(value.encode()).hexdigest()
+        for value in values
+        if value
+    ]
+
+
+def client_ip(request):
+    """
+    Returns the client address set by the trusted proxy, or None
+    """
+    header = settings.DATABASE_REPLICA_CLIENT_IP_HEADER
+    if not header:
+        return None
+    # clients can send the header themselves, the proxy appends the address it saw
+    return request.META.get(header, "").rsplit(",", 1)[-1].strip() or None
+
+
+def pin_to_primary(keys):
+    # anonymous clients without a session have no keys
+    if keys:
+        cache.set_many({key: True for key in keys}, settings.DATABASE_REPLICA_LAG)
+
+
+async def apin_to_primary(keys):
+    if keys:
+        await cache.aset_many(
+            {key: True for key in keys}, settings.DATABASE_REPLICA_LAG
+        )
+
+
+def pin_catalog_readers():
+    """
+    Sends every read to the primary until the replicas have the last catalog write
+    """
+    if settings.DATABASE_REPLICAS:
+        pin_to_primary([PIN_KEY % CATALOG])
+
+
+def reading_replicas():
+    return bool(settings.DATABASE_REPLICAS and _replica_reads.get())
+
+
+@contextmanager
+def primary_reads():
+    """
+    Sends the reads of the block to the primary, e.g. to look up a row that may not be on the replicas yet
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_replicas():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaMiddleware:
+    """
+    Lets safe requests of clients that have not written lately read the replicas,
+    and pins the clients of unsafe requests to the primary
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # under ASGI the chain stays async, Django calls __call__ on the event loop
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        keys = client_keys(request)
+        safe = request.method in SAFE_METHODS
+        pinned = not safe or cache.get_many(keys + [PIN_KEY % CATALOG])
+        token = _replica_reads.set(not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        if not safe:
+            pin_to_primary(keys + issued_keys(response))
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        keys = client_keys(request)
+        safe = request.method in SAFE_METHODS
+        pinned = not safe or await cache.aget_many(keys + [PIN_KEY % CATALOG])
+        token = _replica_reads.set(not pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        if not safe:
+            await apin_to_primary(keys + issued_keys(response))
+        return response
@@ -11,7 +11,10 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 from pathlib import Path
+import os
 import sys
+from .caches import cache_config
+from .database import database_config, replica_configs
 
 TESTING = sys.argv[1:2] == ["test"]
 
@@ -52,7 +55,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "dumblestore.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "dumblestore.replicas.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,9 +90,26 @@ WSGI_APPLICATION = "dumblestore.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db.sqlite3"}
-}
+# configured by DATABASE_URL and DATABASE_REPLICA_URLS, see dumblestore.database
+DATABASES = {"default": database_config(BASE_DIR), **replica_configs(BASE_DIR)}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_REPLICA_LAG = int(os.environ.get("DATABASE_REPLICA_LAG", 5))
+# request.META key of the client address set by a trusted proxy, e.g. HTTP_X_FORWARDED_FOR on Heroku.
+# Unset, clients are only told apart by their token or session
+DATABASE_REPLICA_CLIENT_IP_HEADER = os.environ.get(
+    "DATABASE_REPLICA_CLIENT_IP_HEADER", ""
+)
+DATABASE_ROUTERS = ["dumblestore.replicas.ReplicaRouter"]
+
+# configured by CACHE_URL, see dumblestore.caches. Tests run on an in-process Redis
+CACHES = {"default": cache_config("fakeredis://" if TESTING else None)}
+
+# Seconds a worker keeps serving from its in-process tier after another worker invalidated it,
+# see movies.cache.TwoTierCache. Tests check on every read, they clear the shared cache themselves
+LOCAL_CACHE_CHECK_INTERVAL = (
+    0 if TESTING else float(os.environ.get("LOCAL_CACHE_CHECK_INTERVAL", 1))
+)
 
 
 # Password validation
@@ -108,6 +130,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Tests create users in most setUps, PBKDF2 would dominate their run time. Django's defaults otherwise
+if TESTING:
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Gives every worker of `manage.py test --parallel` a cache of its own, see dumblestore.testing
+TEST_RUNNER = "dumblestore.testing.IsolatedTestRunner"
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
@@ -139,9 +168,21 @@ ACCOUNT_USERNAME_REQUIRED = False
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "movies.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
 }
+
+# Pre-rendered movie list pages, see movies.materialize. "background", "inline" or None to turn them off.
+# Off unless CATALOG_PAGES_MATERIALIZER is set in the environment, the background worker lives in the web process
+CATALOG_PAGES_MATERIALIZER = (
+    None if TESTING else os.environ.get("CATALOG_PAGES_MATERIALIZER") or None
+)
+
+# Bearer token '/metrics' requires, it is off when empty. See dumblestore.metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Cached reads of the catalog are answered on the event loop under ASGI, see movies.async_views. Set by asgi.py
+ASYNC_READ_PATH = os.environ.get("DUMBLESTORE_ASYNC_READ_PATH") == "1"
@@ -0,0 +1,20 @@
+from django.db.backends.sqlite3 import base
+from ..database import SQLITE_PRAGMAS
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The SQLite backend of Django with the pragmas of dumblestore.database applied on connect,
+    and transactions that take the write lock when they begin
+    """
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in SQLITE_PRAGMAS.items():
+            conn.execute("PRAGMA %s = %s" % (name, value))
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # a transaction that reads and then writes gets "database is locked" at once when another connection
+        # wrote in between, busy_timeout only covers waiting for the lock at the start
+        self.cursor().execute("BEGIN IMMEDIATE")
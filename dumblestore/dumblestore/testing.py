@@ -0,0 +1,61 @@
+"""
+Test runner for `manage.py test --parallel`. Django gives every worker a clone of the test database,
+IsolatedTestRunner gives each of them its own cache as well: a key prefix with the worker number and,
+under tests, an in-process Redis of its own. Without it the workers share the versions and entries
+of the catalog and one worker's invalidations break the assertions of another.
+
+The random data of the factories is seeded, every worker and the serial runner start from the same seed.
+
+    TEST_SEED    seed of the factories, 0 by default
+"""
+
+import os
+from django.conf import settings
+from django.core.cache import caches
+from django.test import runner
+
+
+def seed_factories():
+    import factory.random
+
+    seed = int(os.environ.get("TEST_SEED", 0))
+    # also seeds Faker. The random module is left alone, --shuffle draws its seed from it
+    factory.random.reseed_random(seed)
+
+
+def isolate_cache(worker_id):
+    """
+    Moves this process to cache keys and an in-process Redis of its own
+    """
+    for alias, config in settings.CACHES.items():
+        config["KEY_PREFIX"] = "%s.%s" % (config.get("KEY_PREFIX", ""), worker_id)
+        # connections opened before the fork still use the shared prefix
+        try:
+            del caches[alias]
+        except AttributeError:
+            pass
+    try:
+        import fakeredis
+        from .caches import FakeRedisPool
+    except ImportError:
+        return
+    FakeRedisPool.server = fakeredis.FakeServer()
+
+
+def init_worker(counter):
+    # runs in every worker process before its first test, it lives at module level to be picklable
+    runner._init_worker(counter)
+    isolate_cache(runner._worker_id)
+    seed_factories()
+
+
+class IsolatedParallelTestSuite(runner.ParallelTestSuite):
+    init_worker = init_worker
+
+
+class IsolatedTestRunner(runner.DiscoverRunner):
+    parallel_test_suite = IsolatedParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        seed_factories()
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dumblestore.settings')
 
 application = get_wsgi_application()
+
+if settings.DEBUG:
+    # runserver serves the static files of the admin and the browsable API in development
+    application = StaticFilesHandler(application)
@@ -3,6 +3,7 @@ from .models import Genre, Movie
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import User
+from .cache import deferred_invalidation
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 
 
@@ -47,7 +48,16 @@ class UserAdmin(BaseUserAdmin):
     ordering = ("email",)
 
 
+class MovieAdmin(admin.ModelAdmin):
+    def changeform_view(self, *args, **kwargs):
+        """
+        Saving a movie and its genres is a single write as far as the cache is concerned
+        """
+        with deferred_invalidation():
+            return super().changeform_view(*args, **kwargs)
+
+
 admin.site.register(User, UserAdmin)
 
-admin.site.register(Movie)
+admin.site.register(Movie, MovieAdmin)
 admin.site.register(Genre)
@@ -8,3 +8,6 @@ class MoviesConfig(AppConfig):
 
     def ready(self):
         import movies.signals
+
+        # counts the queries of every connection, see MetricsMiddleware
+        import dumblestore.metrics
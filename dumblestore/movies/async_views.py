@@ -0,0 +1,97 @@
+"""
+Async read path for ASGI servers. Reads of the catalog and of '/users/me/' that can be answered from the cache
+are handled on the event loop, so a worker holds many concurrent clients without a thread for each of them.
+Every other request, and every read that needs the database, runs the DRF view in a thread like Django does
+for sync views.
+"""
+
+import functools
+from asgiref.sync import sync_to_async
+from django.urls import URLPattern
+from rest_framework.exceptions import APIException
+from .authentication import CachedTokenAuthentication
+
+# url name -> async handler of the viewset, the handler returns None to fall back to the view
+ASYNC_HANDLERS = {
+    "movie-list": "acached_response",
+    "movie-detail": "acached_response",
+    "user-me": "ame",
+}
+
+
+def async_routes(patterns):
+    """
+    Returns the router patterns with the views of ASYNC_HANDLERS replaced by their async read path
+    """
+    routes = []
+    for pattern in patterns:
+        if isinstance(pattern, URLPattern) and pattern.name in ASYNC_HANDLERS:
+            view = async_read_path(pattern.callback, ASYNC_HANDLERS[pattern.name])
+            pattern = URLPattern(
+                pattern.pattern, view, pattern.default_args, pattern.name
+            )
+        routes.append(pattern)
+    return routes
+
+
+def async_read_path(view, handler_name):
+    """
+    Wraps the view function of a viewset. GET requests try handler_name first, without blocking,
+    and anything it can not answer goes to the view in a thread
+    """
+    sync_view = sync_to_async(view)
+
+    # keeps csrf_exempt and the attributes of the viewset view
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        response = None
+        if request.method == "GET":
+            response = await fast_response(view, handler_name, request, args, kwargs)
+        if response is None:
+            response = await sync_view(request, *args, **kwargs)
+        return response
+
+    return async_view
+
+
+async def fast_response(view, handler_name, request, args, kwargs):
+    """
+    Runs the parts of APIView.dispatch that do not block and then the async handler.
+    Only cached token credentials are accepted here, other credentials are checked by the view
+    """
+    self = view.cls(**view.initkwargs)
+    # same as the view function made by ViewSetMixin.as_view
+    self.action_map = view.actions
+    for method, action in view.actions.items():
+        setattr(self, method, getattr(self, action))
+    self.args, self.kwargs = args, kwargs
+    request = self.initialize_request(request, *args, **kwargs)
+    self.request = request
+    self.headers = self.default_response_headers
+    if self.throttle_classes:
+        return None
+
+    credentials = await CachedTokenAuthentication.acached_credentials(request._request)
+    if credentials is None:
+        return None
+    request.user, request.auth = credentials
+    try:
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = (
+            self.perform_content_negotiation(request)
+        )
+        self.check_permissions(request)
+    except APIException:
+        # the view makes the error response
+        return None
+    # the browsable API renders forms from the database
+    if request.accepted_renderer.format != "json":
+        return None
+
+    response = await getattr(self, handler_name)(request, *args, **kwargs)
+    if response is None:
+        return None
+    response = self.finalize_response(request, response, *args, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    return response
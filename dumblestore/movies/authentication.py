@@ -0,0 +1,70 @@
+import hashlib
+from dumblestore.metrics import timed
+from dumblestore.replicas import primary_reads, reading_replicas
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from .cache import TwoTierCache
+
+TOKEN_GENERATION_KEY = "movies.generation.tokens"
+
+
+def token_cache_key(key):
+    # tokens are credentials, keep them out of the shared cache keys
+    return "movies.token.%s" % hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that remembers resolved tokens in process and in the shared cache,
+    so authenticating a hot request costs no queries.
+    Entries are dropped when the token is deleted or its user changes. Other processes notice it
+    within LOCAL_CACHE_CHECK_INTERVAL seconds, see TwoTierCache.
+    """
+
+    cache_timeout = 60
+    token_cache = TwoTierCache(
+        TOKEN_GENERATION_KEY, max_size=10000, timeout=cache_timeout
+    )
+
+    def authenticate(self, request):
+        with timed("auth"):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        token = self.token_cache.get(cache_key)
+        if token is None:
+            try:
+                user, token = super().authenticate_credentials(key)
+            except AuthenticationFailed:
+                if not reading_replicas():
+                    raise
+                # a token made moments ago may not have reached the replica yet
+                with primary_reads():
+                    user, token = super().authenticate_credentials(key)
+            self.token_cache.set(cache_key, token, self.cache_timeout)
+        return token.user, token
+
+    @classmethod
+    async def acached_credentials(cls, request):
+        """
+        Returns (user, token) for the token of the request if it is cached, otherwise None.
+        Never queries, for the async read path which leaves the rest to authenticate
+        """
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != cls.keyword.lower().encode():
+            return None
+        try:
+            cache_key = token_cache_key(auth[1].decode())
+        except UnicodeError:
+            return None
+        token = await cls.token_cache.aget(cache_key)
+        if token is None:
+            return None
+        if not token.user.is_active:
+            return None
+        return token.user, token
+
+    @classmethod
+    def invalidate(cls, key):
+        cls.token_cache.invalidate(deleted=[token_cache_key(key)])
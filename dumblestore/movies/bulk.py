@@ -0,0 +1,192 @@
+import functools
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from autoslug.utils import crop_slug
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from .cache import invalidate_list
+from .models import Genre, Movie, User
+
+# keeps every IN (...) below the variable limit of older SQLite builds
+CHUNK_SIZE = 900
+
+
+def chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def existing_emails(emails):
+    """
+    Returns the emails that already belong to a user
+    """
+    found = set()
+    for chunk in chunks(emails):
+        found.update(
+            User.objects.filter(email__in=chunk).values_list("email", flat=True)
+        )
+    return found
+
+
+def existing_titles(titles):
+    """
+    Returns the titles that are already in the catalog
+    """
+    found = set()
+    for chunk in chunks(titles):
+        found.update(
+            Movie.objects.filter(title__in=chunk).values_list("title", flat=True)
+        )
+    return found
+
+
+def resolve_genres(names):
+    """
+    Returns {name: genre id} for every name, creating the missing genres in one go
+    """
+    names = set(names)
+    genre_ids = {}
+    for chunk in chunks(names):
+        genre_ids.update(Genre.objects.filter(name__in=chunk).values_list("name", "id"))
+    missing = names - genre_ids.keys()
+    if missing:
+        Genre.objects.bulk_create(
+            [Genre(name=name) for name in missing], batch_size=CHUNK_SIZE
+        )
+        for chunk in chunks(missing):
+            genre_ids.update(
+                Genre.objects.filter(name__in=chunk).values_list("name", "id")
+            )
+    return genre_ids
+
+
+def unique_slugs(titles):
+    """
+    Computes the slugs AutoSlugField would give the titles, querying only for slugs that are already taken
+    """
+    field = Movie._meta.get_field("slug")
+    bases = [crop_slug(field, field.slugify(title)) or "movie" for title in titles]
+
+    taken = set()
+    for chunk in chunks(set(bases)):
+        taken.update(
+            Movie.objects.filter(slug__in=chunk).values_list("slug", flat=True)
+        )
+    # numbered variants only matter for the few bases that collide
+    for base in taken.copy():
+        taken.update(
+            Movie.objects.filter(slug__startswith=base + field.index_sep).values_list(
+                "slug", flat=True
+            )
+        )
+
+    slugs = []
+    for base in bases:
+        slug, index = base, 1
+        while slug in taken:
+            index += 1
+            tail = "%s%d" % (field.index_sep, index)
+            slug = base[: field.max_length - len(tail)] + tail
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def bulk_create_movies(items, batch_size=CHUNK_SIZE):
+    """
+    Inserts movies given as (title, genres) pairs with a constant number of queries per batch.
+    Slugs and genre order indexes are computed in memory, movies and genre links are inserted with bulk_create.
+    Titles must be validated beforehand. Returns the created movies.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    with transaction.atomic():
+        genre_ids = resolve_genres(name for _, genres in items for name in genres)
+        slugs = unique_slugs(title for title, _ in items)
+
+        movies = []
+        for (title, genres), slug in zip(items, slugs):
+            # same as MovieSerializer.handle_genres, genres sorted by name
+            movie = Movie(
+                title=title, slug=slug, genre_order_index="|".join(sorted(set(genres)))
+            )
+            movie._slug_is_unique = True
+            movies.append(movie)
+        Movie.objects.bulk_create(movies, batch_size=batch_size)
+
+        if any(movie.pk is None for movie in movies):
+            # the backend can not return the inserted ids
+            ids = {}
+            for chunk in chunks(slugs):
+                ids.update(
+                    Movie.objects.filter(slug__in=chunk).values_list("slug", "id")
+                )
+            for movie in movies:
+                movie.pk = ids[movie.slug]
+
+        Through = Movie.genres.through
+        links = [
+            Through(movie_id=movie.pk, genre_id=genre_ids[name])
+            for movie, (_, genres) in zip(movies, items)
+            for name in set(genres)
+        ]
+        Through.objects.bulk_create(links, batch_size=batch_size)
+        # bulk_create does not send m2m_changed
+        Genre.objects.add_movie_counts(Counter(link.genre_id for link in links))
+    # bulk_create does not send signals, new movies have no cached details
+    invalidate_list()
+    return movies
+
+
+def init_hashing_worker():
+    # spawned workers need the settings for the password hashers
+    import django
+
+    django.setup()
+
+
+def hashing_executor(processes=None):
+    """
+    Returns a pool of processes for hash_passwords, one per core by default. The caller shuts it down.
+    Returns None in daemonic processes, e.g. the workers of `manage.py test --parallel`, they cannot have children
+    """
+    if multiprocessing.current_process().daemon:
+        return None
+    return ProcessPoolExecutor(
+        processes or os.cpu_count(), initializer=init_hashing_worker
+    )
+
+
+def hash_passwords(passwords, executor=None, hasher="default"):
+    """
+    Hashes passwords with hasher, the first of PASSWORD_HASHERS by default.
+    Hashing is CPU bound, pass an executor from hashing_executor() to use every core
+    """
+    hash_password = functools.partial(make_password, hasher=hasher)
+    if executor is None:
+        return [hash_password(password) for password in passwords]
+    return list(executor.map(hash_password, passwords, chunksize=64))
+
+
+def bulk_create_users(items, executor=None, batch_size=CHUNK_SIZE, hasher="default"):
+    """
+    Inserts users given as dicts of email, first_name, last_name and raw password.
+    Emails must be unused. Returns the created users
+    """
+    items = list(items)
+    passwords = hash_passwords([item["password"] for item in items], executor, hasher)
+    users = [
+        User(
+            email=User.objects.normalize_email(item["email"]),
+            first_name=item["first_name"],
+            last_name=item["last_name"],
+            password=password,
+        )
+        for item, password in zip(items, passwords)
+    ]
+    return User.objects.bulk_create(users, batch_size=batch_size)
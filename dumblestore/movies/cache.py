@@ -0,0 +1,384 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.dispatch import Signal
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from dumblestore.metrics import cache_read
+from rest_framework.response import Response
+
+LIST_VERSION_KEY = "movies.version.list"
+DETAIL_VERSION_KEY = "movies.version.detail.%s"
+CATALOG_GENERATION_KEY = "movies.generation.catalog"
+
+_pending = threading.local()
+
+# sent after the catalog version has been bumped, with the slugs of the invalidated movies
+catalog_invalidated = Signal()
+
+
+async def aget(key):
+    """
+    cache.aget, which runs get in a thread. Reads of the local memory backend never block,
+    so they are made directly on the event loop
+    """
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return cache.get(key)
+    return await cache.aget(key)
+
+
+def new_version(previous=None):
+    """
+    Returns a version token, random so an evicted version can never resurrect old entries.
+    It ends with the time it was made, which serves as the Last-Modified of the entries it versions.
+    The time is later than the one of previous, the token it replaces, even within the same second,
+    so If-Modified-Since never matches entries of an older version
+    """
+    now = int(time.time())
+    before = version_time(previous) if previous is not None else None
+    if before is not None and now <= before:
+        now = before + 1
+    return "%s.%d" % (uuid.uuid4().hex, now)
+
+
+def version_time(version):
+    """
+    Returns the creation time of a version token as a unix timestamp, or None
+    """
+    head, _, timestamp = version.rpartition(".")
+    # tokens made before versions carried a time have none
+    return int(timestamp) if head and timestamp.isdigit() else None
+
+
+def get_version(key, create=True):
+    """
+    Returns the current version token stored under key, creating one if it is missing unless create is False
+    """
+    version = catalog_cache.get(key)
+    if version is None and create:
+        cache.add(key, new_version(), None)
+        version = catalog_cache.get(key)
+    return version
+
+
+def list_version():
+    return get_version(LIST_VERSION_KEY)
+
+
+def detail_version(slug, create=True):
+    return get_version(DETAIL_VERSION_KEY % slug, create)
+
+
+def invalidate_movie(slug):
+    """
+    Invalidates the detail entry of the given movie and the list generation.
+    Inside deferred_invalidation() the work is postponed until the block exits
+    """
+    slugs = getattr(_pending, "slugs", None)
+    if slugs is not None:
+        slugs.add(slug)
+        return
+    _invalidate({slug})
+
+
+def invalidate_list():
+    """
+    Invalidates the list generation only, e.g. after inserting movies
+    """
+    invalidate_movie(None)
+
+
+def _invalidate(slugs):
+    # new tokens rather than deletes, so their time is the time of the write
+    keys = [DETAIL_VERSION_KEY % slug for slug in slugs if slug is not None]
+    keys.append(LIST_VERSION_KEY)
+    current = cache.get_many(keys)
+    catalog_cache.invalidate({key: new_version(current.get(key)) for key in keys})
+    catalog_invalidated.send(sender=None, slugs=slugs)
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Collects invalidations of a logical write (e.g. a save followed by a genre update) and applies them once
+    """
+    if getattr(_pending, "slugs", None) is not None:
+        # nested, the outermost block invalidates
+        yield
+        return
+
+    _pending.slugs = set()
+    try:
+        yield
+    finally:
+        slugs, _pending.slugs = _pending.slugs, None
+        if slugs:
+            _invalidate(slugs)
+
+
+class LRUCache:
+    """
+    Small thread safe in-process cache. Holds at most max_size entries, evicting the least recently used,
+    and every entry expires timeout seconds after it was set
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    An LRUCache in each process (L1) in front of the shared cache (L2).
+    L2 holds a generation token under generation_key, replaced by every invalidate(). Each process compares it
+    with the one it saw last at most every LOCAL_CACHE_CHECK_INTERVAL seconds and drops its L1 when it changed,
+    so an invalidation reaches the L1 of every worker within that delay. Reads in between cost no round trip
+    """
+
+    def __init__(self, generation_key, max_size, timeout):
+        self.generation_key = generation_key
+        self.local = LRUCache(max_size=max_size, timeout=timeout)
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if self._check_due():
+            generation = cache.get(self.generation_key)
+            if generation is None:
+                cache.add(self.generation_key, new_version(), None)
+                generation = cache.get(self.generation_key)
+            self._checked(generation)
+        value = self.local.get(key)
+        cache_read("local", value is not None)
+        if value is None:
+            generation = self._generation
+            value = cache.get(key)
+            cache_read("shared", value is not None)
+            if value is not None:
+                self._fill(key, value, generation)
+        return value
+
+    async def aget(self, key):
+        """
+        Async counterpart of get, for the async read path
+        """
+        if self._check_due():
+            generation = await aget(self.generation_key)
+            if generation is None:
+                await cache.aadd(self.generation_key, new_version(), None)
+                generation = await aget(self.generation_key)
+            self._checked(generation)
+        value = self.local.get(key)
+        cache_read("local", value is not None)
+        if value is None:
+            generation = self._generation
+            value = await aget(key)
+            cache_read("shared", value is not None)
+            if value is not None:
+                self._fill(key, value, generation)
+        return value
+
+    def set(self, key, value, timeout):
+        """
+        Stores a new entry in both tiers. Changing an entry other processes may hold needs invalidate()
+        """
+        cache.set(key, value, timeout)
+        self.local.set(key, value)
+
+    def invalidate(self, changed=None, deleted=()):
+        """
+        Writes the changed entries and removes the deleted keys from L2 together with a new generation,
+        then moves this process to it and drops its L1
+        """
+        if deleted:
+            cache.delete_many(list(deleted))
+        generation = new_version()
+        # in the same write as the entries, a process that sees the generation also sees them
+        cache.set_many({**(changed or {}), self.generation_key: generation}, None)
+        # reads of this process that started before are not kept, see _fill
+        self._checked(generation)
+
+    def _check_due(self):
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at
+            >= settings.LOCAL_CACHE_CHECK_INTERVAL
+        )
+
+    def _checked(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                self.local.clear()
+                self._generation = generation
+        self._checked_at = time.monotonic()
+
+    def _fill(self, key, value, generation):
+        # generation is the one seen before the L2 read. If another thread saw a new one in the meantime,
+        # value may predate it and would outlive the clear by the whole timeout
+        with self._lock:
+            if generation == self._generation:
+                self.local.set(key, value)
+
+
+# versions and responses of the catalog, their keys are versioned so L1 entries only go stale by their versions
+catalog_cache = TwoTierCache(CATALOG_GENERATION_KEY, max_size=1000, timeout=60)
+
+
+class CatalogResponseCacheMixin:
+    """
+    Caches list and detail responses of the catalog after authentication and permission checks.
+    Catalog content does not depend on the user, so every reader shares a single entry per (page, ordering).
+    """
+
+    cache_timeout = 60 * 60
+    # query parameters that change the response data, the rest are ignored for the key
+    cache_query_params = ["ordering", "page"]
+
+    def response_cache_key(self, request, version):
+        params = [
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        ]
+        # the host is part of the key because the serialized urls are absolute
+        raw = "|".join(
+            [version, request.build_absolute_uri(request.path), urlencode(params)]
+        )
+        return "movies.response.%s" % hashlib.md5(raw.encode()).hexdigest()
+
+    def response_etag(self, request, key):
+        # the version is part of the key, the media type tells the JSON and browsable API bodies apart
+        raw = "%s|%s" % (key, request.accepted_media_type)
+        return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+    def validators(self, request, version):
+        """
+        Returns the response cache key, the ETag and the Last-Modified time of a response
+        """
+        key = self.response_cache_key(request, version)
+        return key, self.response_etag(request, key), version_time(version)
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def cached_response(self, request, version, handler, *args, **kwargs):
+        """
+        Answers conditional requests with 304 from the version alone, before the cache or the database is read
+        """
+        key, etag, last_modified = self.validators(request, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.prerendered_response(request, version)
+        if response is None:
+            data = catalog_cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == 200:
+                    catalog_cache.set(key, response.data, self.cache_timeout)
+        return self.set_validators(response, etag, last_modified)
+
+    async def acached_response(self, request, *args, **kwargs):
+        """
+        Async counterpart of list and retrieve that only reads the cache, for the async read path.
+        Returns None when the response needs the database, the caller then runs the view in a thread
+        """
+        if self.action == "list":
+            version_key = LIST_VERSION_KEY
+        elif self.action == "retrieve":
+            version_key = (
+                DETAIL_VERSION_KEY % kwargs[self.lookup_url_kwarg or self.lookup_field]
+            )
+        else:
+            return None
+        version = await catalog_cache.aget(version_key)
+        if version is None:
+            return None
+
+        key, etag, last_modified = self.validators(request, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await self.aprerendered_response(request, version)
+        if response is None:
+            data = await catalog_cache.aget(key)
+            if data is None:
+                return None
+            response = Response(data)
+        return self.set_validators(response, etag, last_modified)
+
+    def prerendered_response(self, request, version):
+        """
+        Hook for views that keep rendered responses, returns None to fall back to the cache and the handler
+        """
+        return None
+
+    async def aprerendered_response(self, request, version):
+        """
+        Async counterpart of prerendered_response
+        """
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, list_version(), super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        slug = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        handler = super().retrieve
+        if detail_version(slug, create=False) is None:
+            # versions never expire, they are only made for movies that exist. A missing one raises NotFound here
+            response = handler(request, *args, **kwargs)
+            handler = lambda *args, **kwargs: response
+        return self.cached_response(
+            request, detail_version(slug), handler, *args, **kwargs
+        )
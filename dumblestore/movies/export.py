@@ -0,0 +1,43 @@
+from collections import defaultdict
+from .models import Movie
+
+EXPORT_FIELDS = ["title", "url", "genres", "slug"]
+
+
+def iter_catalog(url_prefix, chunk_size=2000):
+    """
+    Yields the whole catalog as lists of at most chunk_size rows, shaped like MovieSerializer output.
+    Walks the table by pk so memory stays flat, genres are joined per chunk with a single query
+    """
+    Through = Movie.genres.through
+    last_pk = 0
+    while True:
+        movies = list(
+            Movie.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "title", "slug")[:chunk_size]
+        )
+        if not movies:
+            return
+
+        genres = defaultdict(list)
+        links = (
+            Through.objects.filter(
+                movie_id__gte=movies[0][0], movie_id__lte=movies[-1][0]
+            )
+            .order_by("genre__name")
+            .values_list("movie_id", "genre__name")
+        )
+        for movie_id, name in links:
+            genres[movie_id].append(name)
+
+        yield [
+            {
+                "title": title,
+                "url": url_prefix + slug + "/",
+                "genres": genres[pk],
+                "slug": slug,
+            }
+            for pk, title, slug in movies
+        ]
+        last_pk = movies[-1][0]
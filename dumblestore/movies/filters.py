@@ -1,20 +1,140 @@
 from rest_framework.filters import BaseFilterBackend
+from django.db import connections
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
 from django.db.models.functions import Lower
-import logging, sys
+from .models import Movie
+import logging, re, sys
+
+# ordering parameter -> indexed column it sorts on
+ORDERING_FIELDS = {"title": "title", "genres": "genre_order_index"}
+
+# LOWER() of SQLite only lowers ASCII letters
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+MAX_CHAR = chr(0x10FFFF)
+
+
+def get_ordering(request):
+    """
+    Returns (field, descending) for the requested ordering or None if it is not supported
+    """
+    ordering_param = request.query_params.get("ordering") or ""
+    descending = ordering_param.startswith("-")
+    field = ORDERING_FIELDS.get(ordering_param[1:] if descending else ordering_param)
+    if field is None:
+        return None
+    return field, descending
 
 
 class GenreOrderingFilter(BaseFilterBackend):
     def filter_queryset(self, request, queryset, view):
         """
-        Orders by genre if genre is selected. It uses an additional field in DB because of performance reasons
+        Orders by genre if genre is selected. It uses an additional field in DB because of performance reasons.
+        The pk breaks ties so pages never overlap, (Lower(field), pk) is indexed on Movie
         """
-        ordering_param = request.query_params.get("ordering")
-        if ordering_param == "genres":
-            return queryset.order_by(Lower("genre_order_index"))
-        if ordering_param == "-genres":
-            return queryset.order_by(Lower("genre_order_index")).reverse()
-        if ordering_param == "title":
-            return queryset.order_by(Lower("title"))
-        if ordering_param == "-title":
-            return queryset.order_by(Lower("title")).reverse()
+        ordering = get_ordering(request)
+        if ordering is None:
+            return queryset
+        field, descending = ordering
+        if descending:
+            return queryset.order_by(Lower(field).desc(), "-pk")
+        return queryset.order_by(Lower(field), "pk")
+
+
+class MovieSearchFilter(BaseFilterBackend):
+    """
+    '?title_prefix=' matches titles starting with the value, case insensitive.
+    It is a range on the lowercase title index rather than a LIKE, so it never scans the table.
+    The value is lowered the way the database lowers titles, on SQLite only ASCII letters are case insensitive.
+    '?search=' matches titles containing every word of the value as a word or word prefix, e.g. 'star wa'.
+    On SQLite it is answered by the FTS5 table movies_movie_fts, on PostgreSQL by the full text index
+    movies_movie_title_tsv, other backends fall back to icontains.
+    """
+
+    search_param = "search"
+    prefix_param = "title_prefix"
+
+    def filter_queryset(self, request, queryset, view):
+        prefix = request.query_params.get(self.prefix_param)
+        if prefix:
+            queryset = self.filter_prefix(queryset, prefix)
+        terms = re.findall(r"\w+", request.query_params.get(self.search_param) or "")
+        if terms:
+            queryset = self.filter_search(queryset, terms)
         return queryset
+
+    def filter_prefix(self, queryset, prefix):
+        if connections[queryset.db].vendor == "sqlite":
+            prefix = prefix.translate(ASCII_LOWER)
+        else:
+            prefix = prefix.lower()
+        queryset = queryset.alias(title_lower=Lower("title")).filter(
+            title_lower__gte=prefix
+        )
+        # every string starting with prefix sorts before prefix with its last character incremented.
+        # The last character cannot be incremented, it is dropped from the bound
+        stem = prefix.rstrip(MAX_CHAR)
+        if not stem:
+            return queryset
+        last = ord(stem[-1]) + 1
+        if 0xD800 <= last <= 0xDFFF:
+            # surrogates cannot be encoded, the next character is U+E000
+            last = 0xE000
+        return queryset.filter(title_lower__lt=stem[:-1] + chr(last))
+
+    def filter_search(self, queryset, terms):
+        vendor = connections[queryset.db].vendor
+        if vendor == "postgresql":
+            # \w+ terms need no quoting, :* makes every term a prefix query
+            query = " & ".join("%s:*" % term for term in terms)
+            return queryset.filter(
+                pk__in=RawSQL(
+                    "SELECT id FROM movies_movie "
+                    "WHERE to_tsvector('simple', title) @@ to_tsquery('simple', %s)",
+                    [query],
+                )
+            )
+        if vendor != "sqlite":
+            query = Q()
+            for term in terms:
+                query &= Q(title__icontains=term)
+            return queryset.filter(query)
+        # quoted so user input is never parsed as FTS5 syntax, * makes every term a prefix query
+        match = " ".join('"%s"*' % term for term in terms)
+        return queryset.filter(
+            pk__in=RawSQL(
+                "SELECT rowid FROM movies_movie_fts WHERE movies_movie_fts MATCH %s",
+                [match],
+            )
+        )
+
+
+class GenreFilter(BaseFilterBackend):
+    """
+    '?genre=Drama&genre=Comedy' keeps movies that have all of the genres, add '&genre_mode=any' to keep movies
+    that have at least one of them. Unknown modes fall back to 'all'.
+    The genres are matched in a single subquery on the (genre_id, movie_id) index of the through table,
+    so no join is made against the movie table and the cost grows with the matching movies rather than the catalog.
+    """
+
+    genre_param = "genre"
+    mode_param = "genre_mode"
+    modes = ("all", "any")
+
+    def filter_queryset(self, request, queryset, view):
+        names = [
+            name for name in request.query_params.getlist(self.genre_param) if name
+        ]
+        if not names:
+            return queryset
+        mode = request.query_params.get(self.mode_param)
+        if mode not in self.modes:
+            mode = self.modes[0]
+
+        movie_ids = Movie.genres.through.objects.filter(genre__name__in=names)
+        movie_ids = movie_ids.values("movie_id")
+        if mode == "all" and len(set(names)) > 1:
+            # one pass over the index ranges of the genres, a movie must show up once per genre
+            movie_ids = movie_ids.annotate(matches=Count("*"))
+            movie_ids = movie_ids.filter(matches=len(set(names))).values("movie_id")
+        return queryset.filter(pk__in=movie_ids)
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from movies.materialize import ORDERINGS, materializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders every page of the movie list for every ordering into the cache now, "
+        "instead of waiting for the first request. Needs a cache shared with the web processes"
+    )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        materializer.process([None])
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Rendered the pages of %d orderings in %.1fs"
+                % (len(ORDERINGS), time.monotonic() - start)
+            )
+        )
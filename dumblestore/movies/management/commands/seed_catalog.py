@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+import time
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from movies.bulk import (
+    bulk_create_movies,
+    bulk_create_users,
+    existing_emails,
+    existing_titles,
+    hashing_executor,
+)
+from movies.models import Genre, Movie, User
+
+
+def read_rows(path):
+    """
+    Yields rows of a MOCK_DATA.json style file, JSON or CSV with the same columns
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads users and movies from a MOCK_DATA.json style JSON or CSV file directly into the database. "
+        "Rows are inserted in batches with bulk_create and every batch is committed, "
+        "so an interrupted run can be resumed by running it again: existing users and movies are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON or CSV file, e.g. movies/MOCK_DATA.json")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="worker processes hashing passwords, 1 hashes in this process",
+        )
+        parser.add_argument(
+            "--hasher",
+            default="default",
+            help="algorithm of PASSWORD_HASHERS to hash passwords with, the first one by default. "
+            "Users log in with any of them and are hashed again with the first one when they do",
+        )
+        parser.add_argument("--skip-users", action="store_true")
+        parser.add_argument("--skip-movies", action="store_true")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["path"]):
+            raise CommandError("%s does not exist" % options["path"])
+        try:
+            get_hasher(options["hasher"])
+        except ValueError as e:
+            raise CommandError(e)
+
+        executor = None
+        if not options["skip_users"] and options["processes"] > 1:
+            executor = hashing_executor(options["processes"])
+
+        start = time.monotonic()
+        seen = users = movies = skipped_users = skipped_movies = 0
+        try:
+            for batch in batches(read_rows(options["path"]), options["batch_size"]):
+                if not options["skip_users"]:
+                    new_users, invalid = self.new_users(batch)
+                    bulk_create_users(new_users, executor, hasher=options["hasher"])
+                    users += len(new_users)
+                    skipped_users += invalid
+                if not options["skip_movies"]:
+                    new_movies, invalid = self.new_movies(batch)
+                    bulk_create_movies(new_movies)
+                    movies += len(new_movies)
+                    skipped_movies += invalid
+                seen += len(batch)
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    "%d rows read, %d users and %d movies created, "
+                    "%d invalid user rows and %d invalid movie rows skipped (%.0f rows/s)"
+                    % (
+                        seen,
+                        users,
+                        movies,
+                        skipped_users,
+                        skipped_movies,
+                        seen / elapsed,
+                    )
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded %d users and %d movies in %.1fs"
+                % (users, movies, time.monotonic() - start)
+            )
+        )
+
+    def new_users(self, batch):
+        """
+        Returns the users of the batch that are not in the database yet and the number of invalid rows
+        """
+        rows = [row for row in batch if row.get("email") and row.get("first_name")]
+        emails = [User.objects.normalize_email(row["email"]) for row in rows]
+        taken = existing_emails(emails)
+        users = []
+        for row, email in zip(rows, emails):
+            if email in taken:
+                continue
+            taken.add(email)
+            users.append(
+                {
+                    "email": email,
+                    "first_name": row["first_name"][:50],
+                    "last_name": row.get("last_name", "")[:50],
+                    # same convention as movies.util.init_db
+                    "password": row["first_name"] + "42",
+                }
+            )
+        return users, len(batch) - len(rows)
+
+    def new_movies(self, batch):
+        """
+        Returns (title, genres) of the movies of the batch that are not in the database yet
+        and the number of invalid rows
+        """
+        max_length = Movie._meta.get_field("title").max_length
+        # SQLite stores longer genre names, other databases fail the whole batch
+        genre_length = Genre._meta.get_field("name").max_length
+        rows = [
+            (row["Movie Title"], row["Movie Genres"].split("|"))
+            for row in batch
+            if row.get("Movie Title")
+            and len(row["Movie Title"]) <= max_length
+            and row.get("Movie Genres")
+        ]
+        rows = [
+            (title, genres)
+            for title, genres in rows
+            if all(0 < len(genre) <= genre_length for genre in genres)
+        ]
+        taken = existing_titles([title for title, _ in rows])
+        movies = []
+        for title, genres in rows:
+            if title in taken:
+                continue
+            taken.add(title)
+            movies.append((title, genres))
+        return movies, len(batch) - len(rows)
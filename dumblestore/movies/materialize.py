@@ -0,0 +1,315 @@
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.db.models.functions import Lower
+from .cache import LIST_VERSION_KEY, aget, catalog_cache, list_version
+from .filters import ORDERING_FIELDS
+from .models import Movie
+from .pagination import MoviePagination
+from .renderers import FastJSONRenderer
+from .serializers import MovieSerializer
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "movies.pages.state"
+PAGE_KEY = "movies.pages.%s.%d"
+BUILD_KEY = "movies.pages.building"
+# seconds a full render may take before another one is asked for, the lock is released once the state is written
+BUILD_TIMEOUT = 60 * 60
+# served pages in the local tier of catalog_cache, by the list version they were served for
+LOCAL_PAGE_KEY = "movies.pages.%s.%d.%s"
+
+# ordering parameter -> (column, case insensitive, descending). None is the default ordering of Movie
+ORDERINGS = {None: ("title", False, False)}
+for _name, _column in ORDERING_FIELDS.items():
+    ORDERINGS[_name] = (_column, True, False)
+    ORDERINGS["-" + _name] = (_column, True, True)
+
+
+def page_key(ordering, page):
+    return PAGE_KEY % (ordering or "default", page)
+
+
+def sort_key(column, lower):
+    return Lower(column) if lower else F(column)
+
+
+def sorted_movies(ordering):
+    """
+    Movies in the order the list view returns them for the ordering parameter, with the sort key selected.
+    Titles are unique, so breaking ties on pk does not change the default ordering
+    """
+    column, lower, descending = ORDERINGS[ordering]
+    prefix = "-" if descending else ""
+    queryset = Movie.objects.annotate(sort_key=sort_key(column, lower))
+    return queryset.order_by(prefix + "sort_key", prefix + "pk")
+
+
+def snapshot(movie):
+    """
+    The values of a movie the orderings depend on
+    """
+    return {"title": movie.title, "genre_order_index": movie.genre_order_index}
+
+
+class CatalogMaterializer:
+    """
+    Keeps the result list of every page of the unfiltered movie list pre-rendered in the cache,
+    for the default ordering and every ordering of GenreOrderingFilter.
+    Urls are stored relative and completed with the origin of the request that reads them.
+
+    Writes record which movies changed, and once the catalog version is bumped only the pages those movies
+    moved from, to or through are rendered again. Inserts and deletes shift every later page.
+    Writes the materializer does not know about (e.g. bulk imports) render everything again.
+
+    Pages are only served while the materialized state matches the current catalog version,
+    so a request never sees a page older than the last write of this process. Writes of other processes
+    are picked up once their own materializer is done.
+    Set CATALOG_PAGES_MATERIALIZER to "background" to render in a worker thread, "inline" to render during the write
+    or None to turn it off.
+    """
+
+    # past this many changed movies everything is rendered again
+    max_events = 500
+    # seconds the worker waits for more writes before it renders
+    delay = 0.2
+
+    def __init__(self):
+        self._pending = threading.local()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        return getattr(settings, "CATALOG_PAGES_MATERIALIZER", None)
+
+    page_size = MoviePagination.page_size
+
+    # recording writes
+
+    def movie_changed(self, pk, before, after):
+        """
+        Records a movie write, before is None for inserts and after is None for deletes
+        """
+        if self.mode:
+            self._events().append((pk, before, after))
+
+    def catalog_changed(self):
+        """
+        Records a write that can affect any page
+        """
+        if self.mode:
+            self._events().append(None)
+
+    def flush(self):
+        """
+        Renders the pages affected by the writes recorded so far. Called once the catalog version has been bumped
+        """
+        if not self.mode:
+            return
+        events, self._pending.events = self._events(), []
+        # a version bump without recorded writes comes from a write made behind our back
+        self.submit(events or [None])
+
+    def _events(self):
+        if not hasattr(self._pending, "events"):
+            self._pending.events = []
+        return self._pending.events
+
+    def submit(self, events):
+        if self.mode == "inline":
+            self.process(events)
+            return
+        self._queue.put(events)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._work, name="catalog-materializer", daemon=True
+                )
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            events = list(self._queue.get())
+            time.sleep(self.delay)
+            while not self._queue.empty():
+                events.extend(self._queue.get_nowait())
+            try:
+                self.process(events)
+            except Exception:
+                logger.exception("Materializing catalog pages failed")
+                cache.delete(STATE_KEY)
+            finally:
+                connections.close_all()
+
+    # rendering
+
+    def process(self, events):
+        """
+        Renders the pages affected by events, a None event renders everything
+        """
+        try:
+            # read first, a write made while rendering bumps the version again and stops these pages from being served.
+            # From the shared cache, the local tier may be behind by LOCAL_CACHE_CHECK_INTERVAL
+            version = cache.get(LIST_VERSION_KEY) or list_version()
+            state = cache.get(STATE_KEY)
+            count = Movie.objects.count()
+            if state is None or None in events or len(events) > self.max_events:
+                spans = {ordering: [(1, None)] for ordering in ORDERINGS}
+            else:
+                spans = self.affected_pages(events, count)
+
+            last_page = max(1, -(-count // self.page_size))
+            old_last_page = max(1, -(-state["count"] // self.page_size)) if state else 0
+            for ordering, ordering_spans in spans.items():
+                for first, last in ordering_spans:
+                    self.render_pages(ordering, first, last)
+                # pages that do not exist anymore, Redis rejects a delete without keys
+                stale = range(last_page + 1, old_last_page + 1)
+                if stale:
+                    cache.delete_many([page_key(ordering, page) for page in stale])
+            cache.set(STATE_KEY, {"version": version, "count": count}, None)
+        finally:
+            # lets page ask for a full render again, there is a state to serve from now or the render failed
+            cache.delete(BUILD_KEY)
+
+    def render_pages(self, ordering, first, last=None):
+        """
+        Renders pages first to last, or to the end of the catalog when last is None.
+        Only the first page is found with an offset, the rest are read by seeking on the sort key
+        """
+        queryset = sorted_movies(ordering)
+        _, _, descending = ORDERINGS[ordering]
+        op = "lt" if descending else "gt"
+        size = self.page_size
+        movies = list(queryset[(first - 1) * size : first * size])
+        page = first
+        while movies or page == 1:
+            cache.set(page_key(ordering, page), self.render(movies), None)
+            if len(movies) < size or page == last:
+                return
+            row = movies[-1]
+            after = Q(**{"sort_key__" + op: row.sort_key}) | Q(
+                sort_key=row.sort_key, **{"pk__" + op: row.pk}
+            )
+            movies = list(queryset.filter(after)[:size])
+            page += 1
+
+    def render(self, movies):
+        serializer = MovieSerializer(
+            movies, many=True, context={"request": None, "format": None}
+        )
+        return FastJSONRenderer().render(serializer.data)
+
+    def affected_pages(self, events, count):
+        """
+        Returns {ordering: [(first page, last page or None for the end)]}.
+        Positions are counted on the current rows and widened by one, so they hold for the rows before the write too
+        """
+        positions = {}
+
+        def position(column, lower, keys, pk):
+            # rows before the given values in ascending order
+            cache_key = (column, lower, keys[column], pk)
+            if cache_key not in positions:
+                value = Value(keys[column])
+                value = Lower(value) if lower else value
+                before = Q(sort_key__lt=value)
+                if pk is not None:
+                    before |= Q(sort_key=value, pk__lt=pk)
+                queryset = Movie.objects.annotate(sort_key=sort_key(column, lower))
+                positions[cache_key] = queryset.filter(before).count()
+            return positions[cache_key]
+
+        spans = {}
+        for ordering, (column, lower, descending) in ORDERINGS.items():
+            ordering_spans = []
+            for pk, before, after in events:
+                found = [
+                    position(column, lower, keys, pk)
+                    for keys in (before, after)
+                    if keys is not None
+                ]
+                low, high = max(0, min(found) - 1), max(found) + 1
+                if descending:
+                    low, high = max(0, count - 1 - high), count - 1 - low
+                first = low // self.page_size + 1
+                last = max(first, high // self.page_size + 1)
+                # an insert or a delete shifts every row after it
+                shifts = before is None or after is None
+                ordering_spans.append((first, None if shifts else last))
+            spans[ordering] = self.merge(ordering_spans)
+        return spans
+
+    def merge(self, spans):
+        merged = []
+        for first, last in sorted(spans, key=lambda span: span[0]):
+            if merged and (merged[-1][1] is None or first <= merged[-1][1] + 1):
+                previous_first, previous_last = merged[-1]
+                end = (
+                    None if None in (previous_last, last) else max(previous_last, last)
+                )
+                merged[-1] = (previous_first, end)
+            else:
+                merged.append((first, last))
+        return merged
+
+    # serving
+
+    def page(self, ordering, page, version):
+        """
+        Returns (catalog size, rendered results) of the page or None if it is not materialized for version.
+        Asks for a full render the first time nothing is materialized
+        """
+        if not self.mode:
+            return None
+        local_key = LOCAL_PAGE_KEY % (ordering, page, version)
+        found = catalog_cache.local.get(local_key)
+        if found is not None:
+            return found
+        state = cache.get(STATE_KEY)
+        if state is None:
+            if cache.add(BUILD_KEY, True, BUILD_TIMEOUT):
+                self.submit([None])
+            return None
+        if not self.serves(state, page, version):
+            return None
+        results = cache.get(page_key(ordering, page))
+        if results is None:
+            return None
+        found = state["count"], results
+        catalog_cache.local.set(local_key, found)
+        return found
+
+    async def apage(self, ordering, page, version):
+        """
+        Async counterpart of page for the async read path. Leaves asking for a full render to page
+        """
+        if not self.mode:
+            return None
+        local_key = LOCAL_PAGE_KEY % (ordering, page, version)
+        found = catalog_cache.local.get(local_key)
+        if found is not None:
+            return found
+        state = await aget(STATE_KEY)
+        if state is None or not self.serves(state, page, version):
+            return None
+        results = await aget(page_key(ordering, page))
+        if results is None:
+            return None
+        found = state["count"], results
+        catalog_cache.local.set(local_key, found)
+        return found
+
+    def serves(self, state, page, version):
+        last_page = max(1, -(-state["count"] // self.page_size))
+        return state["version"] == version and page <= last_page
+
+
+materializer = CatalogMaterializer()
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.2 on 2026-10-18 11:20
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_movie_genre_order_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(django.db.models.functions.text.Lower('title'), django.db.models.expressions.F('id'), name='movie_title_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(django.db.models.functions.text.Lower('genre_order_index'), django.db.models.expressions.F('id'), name='movie_genre_order_lower_idx'),
+        ),
+    ]
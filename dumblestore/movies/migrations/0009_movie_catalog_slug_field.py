@@ -0,0 +1,24 @@
+# Generated by Django 4.0.2 on 2026-10-18 11:24
+
+from django.db import migrations
+import movies.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_movie_lower_sort_indexes'),
+    ]
+
+    # the column is unchanged, only the python field class differs
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='movie',
+                    name='slug',
+                    field=movies.models.CatalogSlugField(blank=True, editable=False, populate_from='title', unique=True),
+                ),
+            ],
+        ),
+    ]
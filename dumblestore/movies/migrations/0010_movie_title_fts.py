@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# external content FTS5 table over movies_movie.title, the triggers keep it in sync with every write
+# including bulk_create and raw SQL, which signals would miss
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE movies_movie_fts USING fts5("
+    "title, content='movies_movie', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER movies_movie_fts_insert AFTER INSERT ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER movies_movie_fts_delete AFTER DELETE ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title) VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER movies_movie_fts_update AFTER UPDATE OF title ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    "INSERT INTO movies_movie_fts(rowid, title) VALUES (new.id, new.title); END",
+    "INSERT INTO movies_movie_fts(movies_movie_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS movies_movie_fts_insert",
+    "DROP TRIGGER IF EXISTS movies_movie_fts_delete",
+    "DROP TRIGGER IF EXISTS movies_movie_fts_update",
+    "DROP TABLE IF EXISTS movies_movie_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    # other backends fall back to a case insensitive match, see movies.filters.MovieSearchFilter
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0009_movie_catalog_slug_field"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    The auto created through table is only indexed on (movie_id, genre_id) and on genre_id alone.
+    Genre filters look movies up by genre, (genre_id, movie_id) answers them from the index without reading the table
+    """
+
+    dependencies = [
+        ("movies", "0010_movie_title_fts"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX movies_movie_genres_genre_movie_idx "
+            "ON movies_movie_genres (genre_id, movie_id)",
+            "DROP INDEX movies_movie_genres_genre_movie_idx",
+        ),
+    ]
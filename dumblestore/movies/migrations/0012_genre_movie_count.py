@@ -0,0 +1,28 @@
+# Generated by Django 4.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_movies(apps, schema_editor):
+    Genre = apps.get_model('movies', 'Genre')
+    Movie = apps.get_model('movies', 'Movie')
+    links = Movie.genres.through.objects.filter(genre_id=models.OuterRef('pk'))
+    links = links.values('genre_id').annotate(count=models.Count('*'))
+    Genre.objects.update(movie_count=Coalesce(models.Subquery(links.values('count')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_movie_genres_genre_movie_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='movie_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_movies, migrations.RunPython.noop),
+    ]
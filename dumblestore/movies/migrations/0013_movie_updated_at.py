@@ -0,0 +1,40 @@
+# Generated by Django 4.0.2 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+# adding the column rebuilds movies_movie on SQLite, which drops the triggers of 0010_movie_title_fts.
+# Rows keep their ids so the search index itself stays valid, only the triggers are created again
+FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS movies_movie_fts_insert AFTER INSERT ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_movie_fts_delete AFTER DELETE ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title) VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_movie_fts_update AFTER UPDATE OF title ON movies_movie BEGIN "
+    "INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    "INSERT INTO movies_movie_fts(rowid, title) VALUES (new.id, new.title); END",
+]
+
+
+def restore_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_TRIGGERS:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_genre_movie_count'),
+    ]
+
+    operations = [
+        # undoing the column rebuilds the table as well
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name='movie',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+    ]
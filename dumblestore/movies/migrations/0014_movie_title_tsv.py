@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# full text index of ?search= on PostgreSQL, SQLite has movies_movie_fts. The expression must match
+# the one of movies.filters.MovieSearchFilter for the planner to use the index
+CREATE_SQL = (
+    "CREATE INDEX IF NOT EXISTS movies_movie_title_tsv "
+    "ON movies_movie USING gin (to_tsvector('simple', title))"
+)
+
+DROP_SQL = "DROP INDEX IF EXISTS movies_movie_title_tsv"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0013_movie_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -3,6 +3,7 @@ from autoslug import AutoSlugField
 from django.db import models
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Coalesce, Lower
 from django.urls import reverse
 
 # Create your models here.
@@ -62,12 +63,54 @@ class User(AbstractUser):
         return self.email
 
 
+class CatalogSlugField(AutoSlugField):
+    """
+    AutoSlugField that keeps a slug computed in advance by the bulk import instead of querying for its uniqueness
+    """
+
+    def pre_save(self, instance, add):
+        if add and getattr(instance, "_slug_is_unique", False):
+            return self.value_from_object(instance)
+        return super().pre_save(instance, add)
+
+
+class GenreManager(models.Manager):
+    def add_movie_counts(self, counts):
+        """
+        Adds {genre id: delta} to the movie counts of the genres in a single update
+        """
+        counts = {pk: delta for pk, delta in counts.items() if delta}
+        if not counts:
+            return
+        self.filter(pk__in=counts).update(
+            movie_count=models.Case(
+                *[
+                    models.When(pk=pk, then=models.F("movie_count") + delta)
+                    for pk, delta in counts.items()
+                ],
+                default=models.F("movie_count"),
+            )
+        )
+
+    def recount_movies(self):
+        """
+        Recomputes every movie count from the through table, for writes that bypass the ORM
+        """
+        links = Movie.genres.through.objects.filter(genre_id=models.OuterRef("pk"))
+        links = links.values("genre_id").annotate(count=models.Count("*"))
+        self.update(movie_count=Coalesce(models.Subquery(links.values("count")), 0))
+
+
 class Genre(models.Model):
     """
     Genres can belong to multiple movies.
+    Movie count is maintained on every change of the movie genres so it can be listed without a scan
     """
 
     name = models.CharField(max_length=30, unique=True)
+    movie_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = GenreManager()
 
     class Meta:
         ordering = ["name"]
@@ -78,18 +121,29 @@ class Genre(models.Model):
 
 class Movie(models.Model):
     """
-    Movie object. Has a title and multiple genres. Genre order index is used for sorting
+    Movie object. Has a title and multiple genres. Genre order index is used for sorting.
+    Sorting is case insensitive, the functional indexes let the database read it in index order
     """
 
     title = models.CharField(max_length=100, db_index=True, unique=True, blank=False)
     genres = models.ManyToManyField(Genre, related_name="genres")
-    slug = AutoSlugField(populate_from="title", unique=True, db_index=True, blank=True)
+    slug = CatalogSlugField(
+        populate_from="title", unique=True, db_index=True, blank=True
+    )
     genre_order_index = models.CharField(
         max_length=200, db_index=True, unique=False, default=""
     )
+    # genre changes touch it as well, see movies.signals
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["title"]
+        indexes = [
+            models.Index(Lower("title"), "id", name="movie_title_lower_idx"),
+            models.Index(
+                Lower("genre_order_index"), "id", name="movie_genre_order_lower_idx"
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse("questions:detail", kwargs={"slug": self.slug, "pk": self.pk})
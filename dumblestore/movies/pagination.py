@@ -0,0 +1,128 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.db.models import Q
+from django.db.models.functions import Lower
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from .filters import get_ordering
+
+# primary keys are signed 64 bit integers in every supported database
+MAX_PK = 2**63 - 1
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seeks on (lowercase sort column, pk) instead of using OFFSET, so every page costs the same as the first one.
+    Both are served by the functional indexes on Movie.
+    No count query is made, responses only contain 'next' and 'previous' links.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    default_ordering = ("title", False)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = get_ordering(request) or self.default_ordering
+        position, backwards = self.decode_cursor(request)
+
+        # walking backwards is walking forwards on the reversed ordering
+        descending = self.descending != backwards
+        prefix = "-" if descending else ""
+        # the sort key is selected so cursors carry the value the database compares, not a python lowercase
+        queryset = queryset.annotate(sort_key=Lower(self.field))
+        queryset = queryset.order_by(prefix + "sort_key", prefix + "pk")
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, descending))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if backwards:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+        self.page = rows
+        return rows
+
+    def seek(self, position, descending):
+        """
+        Rows strictly after position. The redundant gte/lte bound lets the database use the column index as a range
+        """
+        value, pk = position
+        op, bound = ("lt", "lte") if descending else ("gt", "gte")
+        after = Q(**{"sort_key__" + op: value}) | Q(sort_key=value, **{"pk__" + op: pk})
+        return Q(**{"sort_key__" + bound: value}) & after
+
+    def decode_cursor(self, request):
+        """
+        Returns ((value, pk), backwards) or (None, False) for the first page
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            value, pk, backwards = json.loads(urlsafe_b64decode(encoded.encode()))
+            if not isinstance(value, str) or not isinstance(pk, int):
+                raise ValueError
+            if not -MAX_PK - 1 <= pk <= MAX_PK:
+                # the database driver cannot bind it
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), bool(backwards)
+
+    def encode_cursor(self, row, backwards):
+        position = [row.sort_key, row.pk, backwards]
+        encoded = urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(self.base_url, self.cursor_query_param, "")
+        return self.encode_cursor(self.page[0], True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class MoviePagination(PageNumberPagination):
+    """
+    Page number pagination unless the 'cursor' parameter is given, e.g. '?cursor=' for the first page.
+    Cursor mode supports the same orderings as GenreOrderingFilter and skips the count query.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
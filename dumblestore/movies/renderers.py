@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders one JSON document per line. Streams rows with render_stream, render is used for error responses
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, ensure_ascii=False) + "\n").encode(self.charset)
+
+    def render_stream(self, rows, fields):
+        for chunk in rows:
+            yield "".join(
+                json.dumps({field: row[field] for field in fields}, ensure_ascii=False)
+                + "\n"
+                for row in chunk
+            ).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders rows as CSV with a header line. List values are joined with '|' like Movie.genre_order_index
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return b"".join(self.render_stream([[data]], list(data)))
+
+    def render_stream(self, rows, fields):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for chunk in rows:
+            for row in chunk:
+                writer.writerow(
+                    "|".join(value) if isinstance(value, list) else value
+                    for value in (row[field] for field in fields)
+                )
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson. With the default settings JSONRenderer writes compact, unescaped unicode,
+    which is what orjson writes natively, so the bytes are the same.
+    Indented output (e.g. the browsable API) and other settings are left to JSONRenderer.
+    Meant for plain data: orjson writes NaN as null where the strict JSONRenderer raises
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # datetimes and the like go through the JSONEncoder of rest_framework to keep its formatting
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers larger than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # same as JSONRenderer, these are valid JSON but not valid javascript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,8 +1,15 @@
+import re
+from collections import OrderedDict
+from django.db import models
 from django.forms import SlugField
 from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.reverse import reverse as api_reverse
+from .bulk import bulk_create_movies, chunks, existing_titles
+from .cache import deferred_invalidation
 from .models import Genre, Movie, User
 from django.utils.text import slugify
+from dumblestore.metrics import timed
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
@@ -20,6 +27,80 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
         return user
 
 
+class MovieListSerializer(serializers.ListSerializer):
+    """
+    Read path of MovieSerializer(many=True), it gives the same data as the field by field serialization.
+    The detail url is reversed once per page and completed with each slug,
+    genre names are loaded as plain tuples in one query unless they are already prefetched.
+    Urls are relative when the request in the context is None, like HyperlinkedIdentityField does
+    """
+
+    slug_placeholder = "slug-placeholder"
+    # slugs that reverse() would put in the url as they are
+    plain_slug = re.compile(r"[-\w]+", re.ASCII)
+
+    def to_representation(self, data):
+        if "request" not in self.context:
+            # let the url field complain about the missing request
+            return super().to_representation(data)
+
+        with timed("serialize"):
+            movies = list(data.all() if isinstance(data, models.Manager) else data)
+            url_parts = self.detail_url(self.slug_placeholder).split(
+                self.slug_placeholder
+            )
+            genres = self.genre_names(movies)
+            rows = []
+            for movie in movies:
+                slug = movie.slug
+                if not slug:
+                    url = None
+                elif self.plain_slug.fullmatch(slug):
+                    url = slug.join(url_parts)
+                else:
+                    url = self.detail_url(slug)
+                rows.append(
+                    OrderedDict(
+                        [
+                            ("title", movie.title),
+                            ("url", url),
+                            ("genres", genres[movie.pk]),
+                            ("slug", slug),
+                        ]
+                    )
+                )
+            return rows
+
+    def detail_url(self, slug):
+        # the same call HyperlinkedIdentityField makes
+        return api_reverse(
+            "movie-detail",
+            kwargs={"slug": slug},
+            request=self.context["request"],
+            format=self.context.get("format"),
+        )
+
+    def genre_names(self, movies):
+        """
+        Returns {movie pk: genre names sorted by name}
+        """
+        if all(
+            "genres" in getattr(movie, "_prefetched_objects_cache", {})
+            for movie in movies
+        ):
+            return {
+                movie.pk: [str(genre) for genre in movie.genres.all()]
+                for movie in movies
+            }
+        names = {movie.pk: [] for movie in movies}
+        Through = Movie.genres.through
+        for chunk in chunks(names):
+            links = Through.objects.filter(movie_id__in=chunk).order_by("genre__name")
+            for movie_id, name in links.values_list("movie_id", "genre__name"):
+                names[movie_id].append(name)
+        return names
+
+
 class MovieSerializer(serializers.ModelSerializer):
     """
     Serializer class that binds Movie model to REST API.
@@ -34,6 +115,7 @@ class MovieSerializer(serializers.ModelSerializer):
         fields = ["title", "url", "genres", "slug", "genre_order_index"]
         extra_kwargs = {"url": {"lookup_field": "slug", "read_only": "True"}}
         lookup_field = "slug"
+        list_serializer_class = MovieListSerializer
 
     def create(self, validated_data):
         """
@@ -41,8 +123,9 @@ class MovieSerializer(serializers.ModelSerializer):
         """
 
         genres = validated_data.pop("genres")
-        instance = super().create(validated_data)
-        instance = self.handle_genres(genres, instance)
+        with deferred_invalidation():
+            instance = super().create(validated_data)
+            instance = self.handle_genres(genres, instance)
         return instance
 
     def get_absolute_url(self):
@@ -53,8 +136,9 @@ class MovieSerializer(serializers.ModelSerializer):
         Custom update function to update the genre fields
         """
         genres = validated_data.pop("genres")
-        instance = super().update(instance, validated_data)
-        instance = self.handle_genres(genres, instance)
+        with deferred_invalidation():
+            instance = super().update(instance, validated_data)
+            instance = self.handle_genres(genres, instance)
         return instance
 
     def handle_genres(self, genres, instance):
@@ -70,6 +154,49 @@ class MovieSerializer(serializers.ModelSerializer):
         return instance
 
 
+class MovieBulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of movies with one uniqueness query and inserts it with bulk_create.
+    Errors are reported per item, in the order of the input
+    """
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        titles = [item["title"] for item in value]
+        taken = existing_titles(titles)
+        seen = set()
+        errors = []
+        for title in titles:
+            if title in taken or title in seen:
+                errors.append({"title": ["movie with this title already exists."]})
+            else:
+                errors.append({})
+            seen.add(title)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
+
+    def create(self, validated_data):
+        return bulk_create_movies(
+            (item["title"], item["genres"]) for item in validated_data
+        )
+
+
+class MovieImportSerializer(serializers.Serializer):
+    """
+    Serializer class for the bulk import of movies. Use with many=True
+    """
+
+    title = serializers.CharField(max_length=100)
+    genres = serializers.ListField(
+        child=serializers.CharField(max_length=30), allow_empty=False, write_only=True
+    )
+    slug = serializers.SlugField(read_only=True)
+
+    class Meta:
+        list_serializer_class = MovieBulkListSerializer
+
+
 class GenreSerializer(serializers.ModelSerializer):
     """
     Serializer class that binds Genre model to REST API.
@@ -79,7 +206,7 @@ class GenreSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Genre
-        fields = ["id", "name"]
+        fields = ["id", "name", "movie_count"]
 
     def validate(self, data):
         """
@@ -1,16 +1,158 @@
-from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from collections import Counter
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
-from django.http import HttpRequest
-from django.utils.cache import get_cache_key
-from .models import Movie
+from django.utils import timezone
+from dumblestore.replicas import pin_catalog_readers
+from rest_framework.authtoken.models import Token
+from .authentication import CachedTokenAuthentication
+from .cache import (
+    catalog_invalidated,
+    deferred_invalidation,
+    invalidate_list,
+    invalidate_movie,
+)
+from .materialize import materializer, snapshot
+from .models import Genre, Movie, User
 
 
 @receiver(post_delete, sender=Movie, dispatch_uid="post_deleted")
-def object_post_delete_handler(sender, **kwargs):
-    cache.clear()
+def object_post_delete_handler(sender, instance, **kwargs):
+    materializer.movie_changed(instance.pk, snapshot(instance), None)
+    invalidate_movie(instance.slug)
+
+
+@receiver(pre_save, sender=Movie, dispatch_uid="pre_updated")
+def object_pre_save_handler(sender, instance, **kwargs):
+    """
+    Materialized pages need the values an updated movie was sorted by
+    """
+    if materializer.mode and instance.pk is not None:
+        instance._sorted_by = (
+            Movie.objects.filter(pk=instance.pk)
+            .values("title", "genre_order_index")
+            .first()
+        )
 
 
 @receiver(post_save, sender=Movie, dispatch_uid="post_updated")
-def object_post_save_handler(sender, **kwargs):
-    cache.clear()
+def object_post_save_handler(sender, instance, created, **kwargs):
+    before = None if created else instance.__dict__.pop("_sorted_by", None)
+    if created or before is not None:
+        materializer.movie_changed(instance.pk, before, snapshot(instance))
+    invalidate_movie(instance.slug)
+
+
+@receiver(m2m_changed, sender=Movie.genres.through, dispatch_uid="genres_changed")
+def movie_genres_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Genres can change without saving the movie (e.g. through the admin), so they invalidate the cache
+    and touch the updated_at of the movies as well
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            materializer.movie_changed(
+                instance.pk, snapshot(instance), snapshot(instance)
+            )
+            instance.updated_at = timezone.now()
+            Movie.objects.filter(pk=instance.pk).update(updated_at=instance.updated_at)
+            invalidate_movie(instance.slug)
+        return
+
+    # instance is a Genre, collect the movies it is being attached to or detached from
+    if action == "pre_clear":
+        movies = instance.genres.all()
+    elif action in ("post_add", "post_remove"):
+        movies = Movie.objects.filter(pk__in=pk_set)
+    else:
+        return
+    materializer.catalog_changed()
+    movies.update(updated_at=timezone.now())
+    with deferred_invalidation():
+        for slug in movies.values_list("slug", flat=True):
+            invalidate_movie(slug)
+
+
+@receiver(post_save, sender=Genre, dispatch_uid="genre_updated")
+def genre_post_save_handler(sender, instance, created, **kwargs):
+    """
+    A renamed genre changes the responses of its movies, new genres have none
+    """
+    if created:
+        return
+    genre_changed(instance.genres.values_list("slug", flat=True))
+
+
+@receiver(pre_delete, sender=Genre, dispatch_uid="genre_pre_delete")
+def genre_pre_delete_handler(sender, instance, **kwargs):
+    # the links are deleted with the genre, without m2m_changed
+    instance._movie_slugs = list(instance.genres.values_list("slug", flat=True))
+
+
+@receiver(post_delete, sender=Genre, dispatch_uid="genre_deleted")
+def genre_post_delete_handler(sender, instance, **kwargs):
+    genre_changed(instance.__dict__.pop("_movie_slugs", []))
+
+
+def genre_changed(slugs):
+    materializer.catalog_changed()
+    with deferred_invalidation():
+        invalidate_list()
+        for slug in slugs:
+            invalidate_movie(slug)
+
+
+@receiver(catalog_invalidated, dispatch_uid="catalog_invalidated")
+def catalog_invalidated_handler(sender, **kwargs):
+    pin_catalog_readers()
+    materializer.flush()
+
+
+@receiver(m2m_changed, sender=Movie.genres.through, dispatch_uid="genre_counts")
+def genre_counts_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps Genre.movie_count current. pk_set of a removal may contain objects that are not linked,
+    so the links are counted before they are removed
+    """
+    if action == "post_add":
+        genre_ids = [instance.pk] * len(pk_set) if reverse else pk_set
+        Genre.objects.add_movie_counts(Counter(genre_ids))
+    elif action in ("pre_remove", "pre_clear"):
+        own, other = ("genre_id", "movie_id") if reverse else ("movie_id", "genre_id")
+        links = sender.objects.filter(**{own: instance.pk})
+        if pk_set is not None:
+            links = links.filter(**{other + "__in": pk_set})
+        instance._removed_genre_ids = list(links.values_list("genre_id", flat=True))
+    elif action in ("post_remove", "post_clear"):
+        genre_ids = instance.__dict__.pop("_removed_genre_ids", [])
+        Genre.objects.add_movie_counts({pk: -n for pk, n in Counter(genre_ids).items()})
+
+
+@receiver(pre_delete, sender=Movie, dispatch_uid="movie_genre_counts")
+def movie_pre_delete_handler(sender, instance, **kwargs):
+    """
+    Deleting a movie removes its genre links without m2m_changed
+    """
+    genre_ids = instance.genres.values_list("pk", flat=True)
+    Genre.objects.add_movie_counts({pk: -1 for pk in genre_ids})
+
+
+@receiver(post_delete, sender=Token, dispatch_uid="token_deleted")
+def token_post_delete_handler(sender, instance, **kwargs):
+    CachedTokenAuthentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_updated")
+def user_post_save_handler(sender, instance, created, **kwargs):
+    """
+    Cached tokens carry a copy of the user, so a deactivated or otherwise changed user must be resolved again
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        CachedTokenAuthentication.invalidate(key)
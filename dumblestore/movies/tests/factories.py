@@ -1,6 +1,7 @@
-import random
 import factory
+import factory.random
 from factory import Faker
+from ..bulk import bulk_create_movies
 from ..models import Genre, Movie, User
 
 
@@ -20,7 +21,12 @@ class AdminFactory(factory.django.DjangoModelFactory):
         model = User
         django_get_or_create = ("email",)
 
+    first_name = "albus"
+    last_name = "dumbledore"
     email = "albus@hogwarts.com"
+    password = "kendra1881"
+    is_staff = True
+    is_superuser = True
 
 
 class RandomUserFactory(factory.django.DjangoModelFactory):
@@ -30,14 +36,16 @@ class RandomUserFactory(factory.django.DjangoModelFactory):
     id = None
     first_name = Faker("first_name")
     last_name = Faker("last_name")
-    email = Faker("email")
+    # Faker repeats emails now and then, they are unique
+    email = factory.Sequence(lambda n: "user%d@example.com" % n)
     password = Faker("password")
 
 
 class MovieWithManyGenresFactory(factory.django.DjangoModelFactory):
     """
-    If called like: MovieWithManyGenresFactory(genres=3) creates a Movie with 3 genres.
+    If called like: MovieWithManyGenresFactory(genre_count=3) creates a Movie with 3 of the existing genres.
     if called like: MovieWithManyGenresFactory() creates a Movie with no genres (will not be not allowed)
+    For many movies use MovieWithManyGenresFactory.create_bulk(100, genre_count=2)
     """
 
     class Meta:
@@ -49,4 +57,20 @@ class MovieWithManyGenresFactory(factory.django.DjangoModelFactory):
     def genre_count(obj, create, extracted, **kwargs):
 
         if extracted:
-            obj.genres.set(random.choices(Genre.objects.all(), k=extracted))
+            genre_ids = list(Genre.objects.values_list("pk", flat=True))
+            obj.genres.set(
+                factory.random.randgen.sample(genre_ids, min(extracted, len(genre_ids)))
+            )
+
+    @classmethod
+    def create_bulk(cls, size, genre_count=0, **kwargs):
+        """
+        Same as create_batch(size, genre_count=...) with a constant number of queries per batch:
+        the genres are read once, movies and genre links are inserted with bulk_create_movies
+        """
+        genres = list(Genre.objects.values_list("name", flat=True))
+        k = min(genre_count, len(genres))
+        titles = [movie.title for movie in cls.build_batch(size, **kwargs)]
+        return bulk_create_movies(
+            [(title, factory.random.randgen.sample(genres, k)) for title in titles]
+        )
@@ -0,0 +1,119 @@
+import tempfile
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import include, path, reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from ..async_views import async_routes
+from ..authentication import CachedTokenAuthentication
+from ..cache import aget
+from ..materialize import materializer
+from ..models import Genre
+from ..urls import router
+from .factories import AdminFactory, CustomerUserFactory, MovieWithManyGenresFactory
+
+# the api with the async read path, whatever ASYNC_READ_PATH is
+urlpatterns = [path("api/", include(async_routes(router.urls)))]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadPathTests(APITestCase):
+    """
+    Test class to ensure the async read path answers cached reads without queries
+    and gives the same responses as the DRF views
+    """
+
+    def setUp(self):
+        cache.clear()
+        CachedTokenAuthentication.token_cache.local.clear()
+        self.APIuser = CustomerUserFactory.create()
+        self.token = Token.objects.create(user=self.APIuser)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        Genre.objects.bulk_create([Genre(name="Drama"), Genre(name="Comedy")])
+        self.movies = MovieWithManyGenresFactory.create_batch(3, genre_count=2)
+        self.list_url = reverse("movie-list")
+        self.detail_url = reverse("movie-detail", args=[self.movies[0].slug])
+
+    def assertSameAsTheView(self, url):
+        # the first request runs the view, it caches the token and the response
+        with override_settings(ROOT_URLCONF="dumblestore.urls"):
+            expected = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+        for header in ["Content-Type", "ETag", "Last-Modified", "Vary", "Allow"]:
+            self.assertEqual(response[header], expected[header], header)
+        return response
+
+    def test_cached_list_and_detail_are_served_without_queries(self):
+        for url in [self.list_url, self.list_url + "?ordering=-title", self.detail_url]:
+            with self.subTest(url=url):
+                self.assertSameAsTheView(url)
+
+    def test_conditional_get(self):
+        response = self.assertSameAsTheView(self.list_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.list_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(CATALOG_PAGES_MATERIALIZER="inline")
+    def test_materialized_pages_are_served_without_queries(self):
+        materializer.process([None])
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_misses_and_writes_go_to_the_view(self):
+        with self.assertNumQueries(4):
+            # token, count and page, genre names
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.list_url, {"title": "x", "genres": ["y"]})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_other_credentials_go_to_the_view(self):
+        self.client.credentials()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_login(AdminFactory.create())
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+
+    def test_browsable_api_goes_to_the_view(self):
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url, HTTP_ACCEPT="text/html")
+        self.assertContains(response, "Movie List")
+
+    def test_me(self):
+        self.client.get(reverse("user-me"))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["email"], self.APIuser.email)
+
+
+class AsyncCacheReadTests(SimpleTestCase):
+    """
+    Test class to ensure aget reads the backends it cannot read on the event loop
+    """
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+        ):
+            cache.set("async.test", {"version": 1})
+            self.assertEqual(async_to_sync(aget)("async.test"), {"version": 1})
+            self.assertIsNone(async_to_sync(aget)("async.missing"))
@@ -0,0 +1,160 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from ..authentication import CachedTokenAuthentication
+from ..cache import LRUCache, TwoTierCache
+from .factories import CustomerUserFactory
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Test class to ensure resolved tokens are cached and dropped when they stop being valid
+    """
+
+    def setUp(self):
+        cache.clear()
+        CachedTokenAuthentication.token_cache.local.clear()
+        self.user = CustomerUserFactory.create()
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.auth = CachedTokenAuthentication()
+
+    def authenticate(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Token " + self.key)
+        return self.auth.authenticate(request)
+
+    def test_hot_token_costs_no_queries(self):
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_shared_cache_is_used_when_local_entry_is_missing(self):
+        self.authenticate()
+        CachedTokenAuthentication.token_cache.local.clear()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user, self.user)
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class LRUCacheTests(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        lru = LRUCache(max_size=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual(len(lru), 2)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+
+    def test_entries_expire(self):
+        lru = LRUCache(max_size=2, timeout=60)
+        with mock.patch("movies.cache.time.monotonic", return_value=0):
+            lru.set("a", 1)
+        with mock.patch("movies.cache.time.monotonic", return_value=59):
+            self.assertEqual(lru.get("a"), 1)
+        with mock.patch("movies.cache.time.monotonic", return_value=60):
+            self.assertIsNone(lru.get("a"))
+
+
+@override_settings(LOCAL_CACHE_CHECK_INTERVAL=10)
+class TwoTierCacheTests(TestCase):
+    """
+    Test class to ensure invalidations reach the local tier of every process within the check interval
+    """
+
+    def setUp(self):
+        cache.clear()
+        # two workers sharing the cache
+        self.worker = TwoTierCache("tests.generation", max_size=10, timeout=60)
+        self.other = TwoTierCache("tests.generation", max_size=10, timeout=60)
+
+    def get(self, worker, key, now):
+        with mock.patch("movies.cache.time.monotonic", return_value=now):
+            return worker.get(key)
+
+    def test_hot_entries_are_read_locally(self):
+        self.worker.set("a", 1, 60)
+        self.get(self.worker, "a", 0)
+        with mock.patch.object(cache, "get", wraps=cache.get) as get:
+            self.assertEqual(self.get(self.worker, "a", 5), 1)
+        self.assertEqual(get.call_count, 0)
+
+    def test_invalidation_reaches_other_processes_within_the_interval(self):
+        self.worker.set("a", 1, None)
+        self.assertEqual(self.get(self.worker, "a", 0), 1)
+
+        self.other.invalidate({"a": 2})
+        self.assertEqual(self.get(self.other, "a", 1), 2)
+        self.assertEqual(self.get(self.worker, "a", 9), 1)
+        self.assertEqual(self.get(self.worker, "a", 10), 2)
+
+    def test_deleted_entries_are_dropped_everywhere(self):
+        self.worker.set("a", 1, None)
+        self.get(self.worker, "a", 0)
+        self.other.invalidate(deleted=["a"])
+        self.assertIsNone(self.get(self.worker, "a", 10))
+
+    def test_reads_racing_an_invalidation_are_not_kept(self):
+        self.worker.set("a", 1, None)
+        self.get(self.worker, "b", 0)
+        self.worker.local.clear()
+        read = cache.get
+        raced = []
+
+        def stale_read(key):
+            value = read(key)
+            if key == "a" and not raced:
+                # another thread sees a new generation while this one reads the old entry
+                raced.append(key)
+                self.other.invalidate({"a": 2})
+                self.get(self.worker, "b", 10)
+            return value
+
+        with mock.patch.object(cache, "get", stale_read):
+            self.assertEqual(self.get(self.worker, "a", 5), 1)
+        self.assertEqual(self.get(self.worker, "a", 15), 2)
+
+    def test_reads_racing_an_own_invalidation_are_not_kept(self):
+        self.worker.set("a", 1, None)
+        self.get(self.worker, "a", 0)
+        self.worker.local.clear()
+        read = cache.get
+        raced = []
+
+        def stale_read(key):
+            value = read(key)
+            if key == "a" and not raced:
+                # another thread of this process invalidates while this one reads the old entry
+                raced.append(key)
+                self.worker.invalidate({"a": 2})
+            return value
+
+        with mock.patch.object(cache, "get", stale_read):
+            self.assertEqual(self.get(self.worker, "a", 5), 1)
+        self.assertEqual(self.get(self.worker, "a", 6), 2)
+
+    def test_cleared_shared_cache_drops_the_local_tier(self):
+        self.worker.set("a", 1, None)
+        self.get(self.worker, "a", 0)
+        cache.clear()
+        self.assertIsNone(self.get(self.worker, "a", 10))
@@ -0,0 +1,62 @@
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+from dumblestore.caches import FakeRedisPool, cache_config
+from dumblestore.testing import isolate_cache
+
+
+class CacheConfigTests(SimpleTestCase):
+    """
+    Test class to ensure the cache settings follow the environment
+    """
+
+    def test_local_memory_by_default(self):
+        config = cache_config(environ={})
+        self.assertEqual(
+            config["BACKEND"], "django.core.cache.backends.locmem.LocMemCache"
+        )
+
+    def test_redis_url(self):
+        config = cache_config(environ={"CACHE_URL": "redis://cache.example.com:6379/1"})
+        self.assertEqual(
+            config["BACKEND"], "django.core.cache.backends.redis.RedisCache"
+        )
+        self.assertEqual(config["LOCATION"], "redis://cache.example.com:6379/1")
+        self.assertEqual(config["KEY_PREFIX"], "dumblestore")
+
+    def test_file_url(self):
+        config = cache_config("file:///var/tmp/dumblestore")
+        self.assertEqual(
+            config["BACKEND"], "django.core.cache.backends.filebased.FileBasedCache"
+        )
+        self.assertEqual(config["LOCATION"], "/var/tmp/dumblestore")
+
+    def test_database_url(self):
+        config = cache_config("db://dumblestore_cache")
+        self.assertEqual(
+            config["BACKEND"], "django.core.cache.backends.db.DatabaseCache"
+        )
+        self.assertEqual(config["LOCATION"], "dumblestore_cache")
+
+    def test_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            cache_config("memcached://localhost:11211")
+
+    def test_tests_share_a_redis_cache(self):
+        cache.set("caches.test", {"version": 1})
+        self.assertEqual(cache.get("caches.test"), {"version": 1})
+        cache.delete("caches.test")
+        self.assertIsNone(cache.get("caches.test"))
+
+    @override_settings(CACHES={"default": cache_config("fakeredis://")})
+    def test_workers_get_a_cache_of_their_own(self):
+        server = FakeRedisPool.server
+        cache.set("caches.test", 1)
+        try:
+            isolate_cache(3)
+            self.assertEqual(caches["default"].key_prefix, "dumblestore.3")
+            self.assertIsNot(FakeRedisPool.server, server)
+            self.assertIsNone(cache.get("caches.test"))
+        finally:
+            FakeRedisPool.server = server
+            del caches["default"]
+            cache.delete("caches.test")
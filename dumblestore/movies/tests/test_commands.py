@@ -0,0 +1,135 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth import authenticate
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from ..models import Genre, Movie, User
+
+ROWS = [
+    {
+        "first_name": "Bryan",
+        "last_name": "Butt",
+        "email": "bbutt@example.com",
+        "Movie Title": "Moonlight",
+        "Movie Genres": "Drama|Romance",
+    },
+    {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": "ada@example.com",
+        "Movie Title": "Moon",
+        "Movie Genres": "Sci-Fi",
+    },
+    {
+        "first_name": "Duplicate",
+        "last_name": "Row",
+        "email": "bbutt@example.com",
+        "Movie Title": "Moonlight",
+        "Movie Genres": "Drama",
+    },
+    {
+        "first_name": "Long",
+        "last_name": "Title",
+        "email": "long@example.com",
+        "Movie Title": "x" * 101,
+        "Movie Genres": "Drama",
+    },
+]
+
+
+class SeedCatalogCommandTests(TestCase):
+    """
+    Test class to ensure seed_catalog loads users and movies and can be run again safely
+    """
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write_json(self, rows=ROWS):
+        path = os.path.join(self.dir.name, "data.json")
+        with open(path, "w") as f:
+            json.dump(rows, f)
+        return path
+
+    def seed(self, path, *args):
+        out = StringIO()
+        call_command(
+            "seed_catalog",
+            path,
+            "--processes",
+            "1",
+            "--batch-size",
+            "2",
+            *args,
+            stdout=out
+        )
+        return out.getvalue()
+
+    def test_seeds_users_and_movies(self):
+        users = User.objects.count()
+        self.seed(self.write_json())
+
+        self.assertEqual(User.objects.count(), users + 3)
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertEqual(Genre.objects.count(), 3)
+        movie = Movie.objects.get(title="Moonlight")
+        self.assertEqual(movie.slug, "moonlight")
+        self.assertEqual(movie.genre_order_index, "Drama|Romance")
+        self.assertEqual(
+            list(movie.genres.values_list("name", flat=True)), ["Drama", "Romance"]
+        )
+        self.assertIsNotNone(
+            authenticate(username="bbutt@example.com", password="Bryan42")
+        )
+
+    def test_invalid_rows_are_counted_apart(self):
+        rows = [
+            {**ROWS[0], "email": ""},
+            {**ROWS[1], "Movie Genres": "Sci-Fi|" + "x" * 31},
+            {
+                **ROWS[1],
+                "email": "empty@example.com",
+                "Movie Title": "Empty genre",
+                "Movie Genres": "Drama||",
+            },
+        ]
+        out = self.seed(self.write_json(rows))
+        self.assertIn("1 invalid user rows and 2 invalid movie rows skipped", out)
+        self.assertEqual(
+            list(Movie.objects.values_list("title", flat=True)), ["Moonlight"]
+        )
+        self.assertFalse(Genre.objects.filter(name__startswith="x").exists())
+
+    def test_rerun_skips_existing_rows(self):
+        path = self.write_json()
+        self.seed(path)
+        users, movies = User.objects.count(), Movie.objects.count()
+        out = self.seed(path)
+        self.assertIn("Seeded 0 users and 0 movies", out)
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(Movie.objects.count(), movies)
+
+    def test_csv_and_skip_users(self):
+        path = os.path.join(self.dir.name, "data.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ROWS[0].keys())
+            writer.writeheader()
+            writer.writerows(ROWS)
+        users = User.objects.count()
+        self.seed(path, "--skip-users")
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(Movie.objects.count(), 2)
+
+    def test_passwords_hashed_in_worker_processes(self):
+        self.seed(self.write_json(), "--processes", "2")
+        self.assertIsNotNone(
+            authenticate(username="bbutt@example.com", password="Bryan42")
+        )
+
+    def test_unknown_hasher(self):
+        with self.assertRaises(CommandError):
+            self.seed(self.write_json(), "--hasher", "rot13")
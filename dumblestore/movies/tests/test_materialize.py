@@ -0,0 +1,149 @@
+import json
+from unittest import mock
+from urllib.parse import urljoin
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..bulk import bulk_create_movies
+from ..materialize import BUILD_KEY, ORDERINGS, STATE_KEY, materializer
+from ..models import Genre, Movie
+from .factories import CustomerUserFactory, MovieWithManyGenresFactory
+
+
+@override_settings(CATALOG_PAGES_MATERIALIZER="inline")
+class CatalogMaterializerTests(APITestCase):
+    """
+    Test class to ensure materialized pages are byte for byte the pages the view renders
+    and only the pages a write affects are rendered again
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        for i in range(45):
+            movie = Movie.objects.create(
+                title="Movie %02d" % i, genre_order_index=["Comedy", "drama"][i % 2]
+            )
+            movie.genres.add([self.comedy, self.drama][i % 2])
+        materializer.process([None])
+
+    def queries(self):
+        last_page = -(-Movie.objects.count() // materializer.page_size)
+        for ordering in ORDERINGS:
+            for page in [None, *range(1, last_page + 1)]:
+                params = [("ordering", ordering), ("page", page)]
+                query = "&".join("%s=%s" % (k, v) for k, v in params if v is not None)
+                yield urljoin(self.url, "?" + query)
+
+    def assertPagesMatchTheView(self):
+        for url in self.queries():
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    materialized = self.client.get(url)
+                with override_settings(CATALOG_PAGES_MATERIALIZER=None):
+                    rendered = self.client.get(url)
+                self.assertEqual(materialized.status_code, status.HTTP_200_OK)
+                self.assertEqual(materialized["Content-Type"], rendered["Content-Type"])
+                self.assertEqual(materialized.content, rendered.content)
+
+    def test_pages_match_the_view(self):
+        self.assertPagesMatchTheView()
+
+    def test_insert_renders_the_pages_after_it(self):
+        with mock.patch.object(
+            materializer, "render", wraps=materializer.render
+        ) as render:
+            Movie.objects.create(title="Movie 30b", genre_order_index="zzz")
+        # 3 pages for each of the 5 orderings would be everything
+        self.assertLess(render.call_count, 15)
+        self.assertPagesMatchTheView()
+
+    def test_genre_change_renders_one_page_per_ordering(self):
+        movie = Movie.objects.get(title="Movie 25")
+        with mock.patch.object(
+            materializer, "render", wraps=materializer.render
+        ) as render:
+            movie.genres.add(self.drama)
+        self.assertLessEqual(render.call_count, 2 * len(ORDERINGS))
+        self.assertPagesMatchTheView()
+
+    def test_updates_and_deletes_stay_consistent(self):
+        movie = Movie.objects.get(title="Movie 03")
+        movie.title = "Another movie"
+        movie.save()
+        Movie.objects.get(title="Movie 44").delete()
+        Movie.objects.filter(
+            title__in=["Movie 40", "Movie 41", "Movie 42", "Movie 43"]
+        ).delete()
+        self.assertEqual(self.client.get(self.url).json()["count"], 40)
+        self.assertPagesMatchTheView()
+
+    def test_genre_renames_and_deletes_render_everything(self):
+        self.drama.name = "Thriller"
+        self.drama.save()
+        self.assertPagesMatchTheView()
+        self.comedy.delete()
+        self.assertPagesMatchTheView()
+
+    def test_bulk_import_renders_everything(self):
+        bulk_create_movies([("Bulk %d" % i, ["Western"]) for i in range(5)])
+        self.assertPagesMatchTheView()
+
+    def test_stale_state_falls_back_to_the_view(self):
+        state = cache.get(STATE_KEY)
+        cache.set(STATE_KEY, dict(state, version="stale"), None)
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_build_lock_is_held_until_the_state_is_written(self):
+        cache.delete(STATE_KEY)
+        held = []
+        render = materializer.render
+
+        def rendering(movies):
+            held.append(cache.get(BUILD_KEY))
+            return render(movies)
+
+        with mock.patch.object(materializer, "render", side_effect=rendering):
+            self.client.get(self.url)
+            # the state is written, the next request serves it
+            self.client.get(self.url)
+        self.assertEqual(set(held), {True})
+        self.assertEqual(len(held), 3 * len(ORDERINGS))
+        self.assertIsNotNone(cache.get(STATE_KEY))
+        self.assertIsNone(cache.get(BUILD_KEY))
+
+    def test_failed_build_releases_the_lock(self):
+        cache.delete(STATE_KEY)
+        with mock.patch.object(materializer, "render", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                materializer.page(None, 1, "version")
+        self.assertIsNone(cache.get(BUILD_KEY))
+
+    def test_filtered_and_unknown_requests_fall_back_to_the_view(self):
+        queries = [
+            "?search=movie",
+            "?cursor=",
+            "?page=last",
+            "?ordering=foo",
+            "?format=api",
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                with mock.patch.object(materializer, "page") as page:
+                    resp = self.client.get(urljoin(self.url, query))
+                page.assert_not_called()
+                self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        with mock.patch.object(materializer, "page") as page:
+            resp = self.client.get(self.url, HTTP_ACCEPT="application/json; indent=4")
+        page.assert_not_called()
+        self.assertEqual(resp.content, json.dumps(resp.json(), indent=4).encode())
+        resp = self.client.get(urljoin(self.url, "?page=9"))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
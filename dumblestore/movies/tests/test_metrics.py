@@ -0,0 +1,115 @@
+import asyncio
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.urls import reverse
+from dumblestore.metrics import LATENCY_BUCKETS, Registry
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from ..models import Genre
+from .factories import CustomerUserFactory, MovieWithManyGenresFactory
+
+
+class MetricsMiddlewareTests(APITestCase):
+    """
+    Test class to ensure requests are measured and the totals are served to Prometheus
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.APIuser = CustomerUserFactory.create()
+        token = Token.objects.create(user=self.APIuser)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+        Genre.objects.create(name="Drama")
+        MovieWithManyGenresFactory.create_batch(3, genre_count=1)
+        self.url = reverse("movie-list")
+
+    def server_timing(self, response):
+        timings = {}
+        for timing in response["Server-Timing"].split(", "):
+            name, _, params = timing.partition(";")
+            timings[name] = params
+        return timings
+
+    def test_server_timing(self):
+        timings = self.server_timing(self.client.get(self.url))
+        self.assertIn("total", timings)
+        self.assertRegex(timings["db"], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn("cache", timings)
+        for phase in ["auth", "serialize", "render"]:
+            self.assertRegex(timings[phase], r"dur=[\d.]+")
+
+    def test_cached_response_makes_no_queries(self):
+        self.client.get(self.url)
+        timings = self.server_timing(self.client.get(self.url))
+        self.assertIn('desc="0 queries"', timings["db"])
+        self.assertNotIn("serialize", timings)
+
+    def test_asgi_middleware_chain_stays_async(self):
+        # a sync only middleware would run the whole chain in a thread
+        self.assertTrue(asyncio.iscoroutinefunction(ASGIHandler()._middleware_chain))
+
+    async def test_server_timing_under_asgi(self):
+        credentials = self.client._credentials["HTTP_AUTHORIZATION"]
+        # the async client takes header names
+        response = await AsyncClient().get(self.url, authorization=credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = self.server_timing(response)
+        self.assertRegex(timings["db"], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        for phase in ["auth", "serialize", "render"]:
+            self.assertRegex(timings[phase], r"dur=[\d.]+")
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_endpoint(self):
+        self.client.get(self.url)
+        self.client.credentials()
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertIn("# TYPE dumblestore_request_duration_seconds histogram", text)
+        self.assertIn(
+            'dumblestore_request_duration_seconds_count{route="movie-list",method="GET"}',
+            text,
+        )
+        self.assertIn('dumblestore_db_queries_total{route="movie-list"}', text)
+        self.assertIn(
+            'dumblestore_responses_total{route="movie-list",method="GET",status="200"}',
+            text,
+        )
+
+    def test_metrics_are_off_without_a_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_token(self):
+        self.client.credentials()
+        self.assertEqual(
+            self.client.get(reverse("metrics")).status_code, status.HTTP_403_FORBIDDEN
+        )
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RegistryTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        registry.describe("latency_seconds", "histogram", "Latency")
+        labels = (("route", 'a"b'),)
+        for value in [0.0005, 0.003, 100]:
+            registry.observe("latency_seconds", labels, value, LATENCY_BUCKETS)
+        lines = registry.render().splitlines()
+        self.assertEqual(
+            lines[:2],
+            ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"],
+        )
+        self.assertIn('latency_seconds_bucket{route="a\\"b",le="0.001"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="a\\"b",le="0.005"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="a\\"b",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count{route="a\\"b"} 3', lines)
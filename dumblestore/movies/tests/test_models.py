@@ -1,10 +1,11 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.forms import ValidationError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from .factories import CustomerUserFactory
 
 from ..models import User, Movie, Genre
-from .factories import CustomerUserFactory
+from .factories import CustomerUserFactory, MovieWithManyGenresFactory
 
 
 class UserTests(TestCase):
@@ -105,3 +106,29 @@ class MovieTests(TestCase):
         with self.assertRaises(IntegrityError):
             Movie.objects.create(title="Blade Runner")
             Movie.objects.create(title="Blade Runner")
+
+
+class MovieFactoryTests(TestCase):
+    def setUp(self):
+        Genre.objects.bulk_create(
+            [Genre(name=name) for name in ["Drama", "Comedy", "Scifi"]]
+        )
+
+    def test_bulk_movies_are_like_batch_movies(self):
+        movies = MovieWithManyGenresFactory.create_bulk(10, genre_count=2)
+        self.assertEqual(Movie.objects.count(), 10)
+        for movie in Movie.objects.prefetch_related("genres"):
+            names = sorted(genre.name for genre in movie.genres.all())
+            self.assertEqual(len(names), 2)
+            self.assertEqual(movie.genre_order_index, "|".join(names))
+            self.assertTrue(movie.slug)
+        self.assertEqual(sum(Genre.objects.values_list("movie_count", flat=True)), 20)
+        self.assertEqual(len({movie.title for movie in movies}), 10)
+
+    def test_bulk_queries_do_not_grow_with_size(self):
+        # within one INSERT, SQLite splits them at 999 variables
+        with CaptureQueriesContext(connection) as small:
+            MovieWithManyGenresFactory.create_bulk(10, genre_count=2)
+        with CaptureQueriesContext(connection) as large:
+            MovieWithManyGenresFactory.create_bulk(200, genre_count=2)
+        self.assertEqual(len(small), len(large))
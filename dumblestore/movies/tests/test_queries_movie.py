@@ -0,0 +1,75 @@
+from urllib.parse import urljoin
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from ..models import Genre
+from .factories import (
+    AdminFactory,
+    CustomerUserFactory,
+    MovieWithManyGenresFactory,
+)
+
+
+class MovieQueryBudgetTests(APITestCase):
+    """
+    Pins the number of queries each movie endpoint is allowed to run.
+    Genres must be loaded in a fixed number of queries regardless of the page size
+    """
+
+    def setUp(self):
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+
+        Genre.objects.create(name="Scifi")
+        Genre.objects.create(name="Action")
+        Genre.objects.create(name="Drama")
+        Genre.objects.create(name="Comedy")
+
+        # creating movies also invalidates the page cache
+        self.movies = MovieWithManyGenresFactory.create_bulk(30, genre_count=3)
+
+    def test_list_query_budget(self):
+        # count + page + genres
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["results"]), 20)
+
+    def test_list_query_budget_does_not_grow_with_catalog(self):
+        MovieWithManyGenresFactory.create_bulk(50, genre_count=2)
+        with self.assertNumQueries(3):
+            resp = self.client.get(urljoin(self.url, "?page=3"))
+        self.assertEqual(len(resp.data["results"]), 20)
+
+    def test_ordered_list_query_budget(self):
+        for ordering in ["title", "-title", "genres", "-genres"]:
+            with self.subTest(ordering=ordering):
+                with self.assertNumQueries(3):
+                    resp = self.client.get(urljoin(self.url, "?ordering=" + ordering))
+                self.assertEqual(len(resp.data["results"]), 20)
+
+    def test_cursor_query_budget_does_not_grow_with_depth(self):
+        # page + genres, no count
+        url = urljoin(self.url, "?cursor=&ordering=genres")
+        for _ in range(2):
+            with self.assertNumQueries(2):
+                resp = self.client.get(url)
+            url = resp.data["next"]
+        self.assertEqual(len(resp.data["results"]), 10)
+
+    def test_detail_query_budget(self):
+        # movie + genres
+        url = urljoin(self.url, self.movies[0].slug + "/")
+        with self.assertNumQueries(2):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            resp.data["genres"], [g.name for g in self.movies[0].genres.all()]
+        )
+
+    def test_admin_list_query_budget(self):
+        self.client.force_authenticate(user=AdminFactory.create())
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertEqual(len(resp.data["results"]), 20)
@@ -0,0 +1,175 @@
+import asyncio
+from urllib.parse import urlencode
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from dumblestore.replicas import ReplicaMiddleware, ReplicaRouter, reading_replicas
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from ..authentication import CachedTokenAuthentication
+from ..models import Genre, Movie, User
+from .factories import CustomerUserFactory
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"])
+class ReplicaRoutingTests(TestCase):
+    """
+    Test class to ensure safe requests read the replicas and writers read their writes from the primary
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaMiddleware(self.read)
+
+    def read(self, request):
+        # the database the view would read from
+        return HttpResponse(self.router.db_for_read(Movie))
+
+    def database(self, method="get", **headers):
+        request = getattr(self.factory, method)("/api/movies/", **headers)
+        return self.middleware(request).content.decode()
+
+    def test_safe_requests_read_a_replica(self):
+        self.assertIn(self.database(), ["replica_1", "replica_2"])
+        self.assertIn(self.database("head"), ["replica_1", "replica_2"])
+
+    def test_writes_go_to_the_primary(self):
+        self.assertEqual(self.database("post"), "default")
+        self.assertEqual(self.router.db_for_write(Movie), "default")
+
+    def test_reads_outside_requests_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Movie), "default")
+
+    def test_writer_reads_its_writes(self):
+        admin = {"HTTP_AUTHORIZATION": "Token admin", "REMOTE_ADDR": "10.0.0.1"}
+        customer = {"HTTP_AUTHORIZATION": "Token customer", "REMOTE_ADDR": "10.0.0.2"}
+        self.database("post", **admin)
+        self.assertEqual(self.database(**admin), "default")
+        self.assertIn(self.database(**customer), ["replica_1", "replica_2"])
+
+        cache.clear()
+        self.assertIn(self.database(**admin), ["replica_1", "replica_2"])
+
+    def test_clients_behind_one_address_are_not_pinned_together(self):
+        self.database("post", HTTP_AUTHORIZATION="Token admin", REMOTE_ADDR="10.0.0.1")
+        self.assertIn(
+            self.database(HTTP_AUTHORIZATION="Token other", REMOTE_ADDR="10.0.0.1"),
+            ["replica_1", "replica_2"],
+        )
+
+    @override_settings(DATABASE_REPLICA_CLIENT_IP_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_client_address_from_the_trusted_proxy(self):
+        # logging in writes the token, the next request carries it from the same address
+        self.database("post", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        request = {"HTTP_AUTHORIZATION": "Token new", "HTTP_X_FORWARDED_FOR": "1.2.3.4"}
+        self.assertEqual(self.database(**request), "default")
+        # the proxy appends the address it saw to the one the client sent
+        spoofed = {"HTTP_X_FORWARDED_FOR": "1.2.3.4, 5.6.7.8"}
+        self.assertIn(self.database(**spoofed), ["replica_1", "replica_2"])
+
+    def test_missing_token_is_looked_up_on_the_primary(self):
+        token = Token.objects.create(user=CustomerUserFactory.create())
+        lookups = []
+
+        def lookup(auth, key):
+            lookups.append(reading_replicas())
+            if lookups[-1]:
+                raise AuthenticationFailed("Invalid token.")
+            return token.user, token
+
+        def view(request):
+            CachedTokenAuthentication().authenticate_credentials(token.key)
+            return HttpResponse()
+
+        CachedTokenAuthentication.token_cache.local.clear()
+        with mock.patch.object(TokenAuthentication, "authenticate_credentials", lookup):
+            ReplicaMiddleware(view)(self.factory.get("/api/movies/"))
+        self.assertEqual(lookups, [True, False])
+
+    def test_async_requests(self):
+        async def read(request):
+            return self.read(request)
+
+        middleware = ReplicaMiddleware(read)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        admin = {"HTTP_AUTHORIZATION": "Token admin"}
+        request = self.factory.get("/api/movies/", **admin)
+        self.assertIn(
+            async_to_sync(middleware)(request).content, [b"replica_1", b"replica_2"]
+        )
+        async_to_sync(middleware)(self.factory.post("/api/movies/", **admin))
+        request = self.factory.get("/api/movies/", **admin)
+        self.assertEqual(async_to_sync(middleware)(request).content, b"default")
+
+    def replica_reads(self, *args, **kwargs):
+        """
+        Makes a request with the test client, returns the response and whether each read went to a replica.
+        The reads are made on the primary, the replicas are not configured
+        """
+        reads = []
+
+        def db_for_read(router, model, **hints):
+            reads.append(reading_replicas())
+            return "default"
+
+        with mock.patch.object(ReplicaRouter, "db_for_read", db_for_read):
+            response = self.client.generic(*args, **kwargs)
+        return response, reads
+
+    def test_session_login_reads_its_writes(self):
+        User.objects.create_user(email="login@example.com", password="secret")
+        response, _ = self.replica_reads(
+            "POST",
+            "/api-auth/login/",
+            urlencode({"username": "login@example.com", "password": "secret"}),
+            content_type="application/x-www-form-urlencoded",
+        )
+        self.assertEqual(response.status_code, 302)
+        # the session is only on the primary, the client has not sent its cookie before
+        response, reads = self.replica_reads("GET", "/api/users/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "login@example.com")
+        self.assertTrue(reads)
+        self.assertNotIn(True, reads)
+
+    def test_token_login_reads_its_writes(self):
+        User.objects.create_user(email="login@example.com", password="secret")
+        response, _ = self.replica_reads(
+            "POST",
+            "/api-token-auth/",
+            urlencode({"username": "login@example.com", "password": "secret"}),
+            content_type="application/x-www-form-urlencoded",
+        )
+        token = response.json()["token"]
+        response, reads = self.replica_reads(
+            "GET", "/api/users/me/", HTTP_AUTHORIZATION="Token " + token
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(reads)
+        self.assertNotIn(True, reads)
+
+    def test_catalog_writes_pin_every_reader(self):
+        Genre.objects.create(name="Drama")
+        Movie.objects.create(title="Fargo", genre_order_index="Drama")
+        self.assertEqual(self.database(HTTP_AUTHORIZATION="Token other"), "default")
+
+
+class NoReplicaTests(SimpleTestCase):
+    @override_settings(MIDDLEWARE=["dumblestore.replicas.ReplicaMiddleware"])
+    def test_asgi_middleware_chain_stays_async(self):
+        # a sync only middleware would run the whole chain in a thread
+        self.assertTrue(asyncio.iscoroutinefunction(ASGIHandler()._middleware_chain))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_everything_uses_the_primary(self):
+        middleware = ReplicaMiddleware(
+            lambda request: HttpResponse(ReplicaRouter().db_for_read(Movie))
+        )
+        response = middleware(RequestFactory().get("/api/movies/"))
+        self.assertEqual(response.content, b"default")
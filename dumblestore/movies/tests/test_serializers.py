@@ -1,7 +1,17 @@
 from django.test import TestCase
 from movies.models import Genre, Movie
-from movies.serializers import UserSerializer, MovieSerializer, GenreSerializer
+from movies.renderers import FastJSONRenderer
+from movies.serializers import (
+    GenreSerializer,
+    MovieListSerializer,
+    MovieSerializer,
+    UserSerializer,
+)
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
 from .factories import RandomUserFactory
 
 
@@ -34,7 +44,7 @@ class GenreSerializerTests(TestCase):
         Ensures GenreSerializer contains expected fields
         """
         serializer = GenreSerializer(instance=self.genreModel)
-        self.assertCountEqual(serializer.data.keys(), ["id", "name"])
+        self.assertCountEqual(serializer.data.keys(), ["id", "name", "movie_count"])
 
     def test_genre_created_correctly(self):
         """
@@ -147,3 +157,67 @@ class MovieSerializerTests(TestCase):
             [genre.name for genre in movie.genres.all()],
             ["Action", "Scifi", "Thriller", "Crime"],
         )
+
+
+class MovieListSerializerTests(TestCase):
+    """
+    Test class to ensure the fast list path renders exactly what the field by field serialization rendered
+    """
+
+    def setUp(self):
+        titles = [
+            "Amélie",
+            'Quotes "and" \\ backslashes',
+            "Line\u2028separator\u2029",
+            "Control\x01\tchars",
+            "Emoji 🎬",
+        ]
+        genres = [
+            Genre.objects.create(name=name) for name in ["Drama", "Ação", "Comedy"]
+        ]
+        for i, title in enumerate(titles):
+            movie = Movie.objects.create(title=title)
+            movie.genres.set(genres[: i % 4])
+        # slugs reverse() has to quote take the slow path
+        Movie.objects.create(title="Odd slug", slug="odd slug")
+
+    def render(self, path, list_serializer_class, renderer_class, queryset):
+        request = Request(APIRequestFactory().get(path))
+        context = {"request": request, "format": "json" if "." in path else None}
+        serializer = list_serializer_class(child=MovieSerializer(), context=context)
+        return renderer_class().render(serializer.to_representation(queryset))
+
+    def test_output_matches_field_by_field_serialization(self):
+        for path in ["/api/movies/", "/api/movies.json"]:
+            for queryset in [
+                Movie.objects.all(),
+                Movie.objects.prefetch_related("genres"),
+            ]:
+                with self.subTest(
+                    path=path, prefetched=queryset._prefetch_related_lookups
+                ):
+                    expected = self.render(path, ListSerializer, JSONRenderer, queryset)
+                    actual = self.render(
+                        path, MovieListSerializer, FastJSONRenderer, queryset
+                    )
+                    self.assertEqual(actual, expected)
+
+    def test_genres_are_loaded_in_one_query(self):
+        movies = list(Movie.objects.all())
+        serializer = MovieSerializer(
+            movies,
+            many=True,
+            context={"request": Request(APIRequestFactory().get("/"))},
+        )
+        self.assertIsInstance(serializer, MovieListSerializer)
+        with self.assertNumQueries(1):
+            serializer.data
+
+    def test_renderer_falls_back_for_indent_and_large_integers(self):
+        data = {"big": 2**70, "text": "é\u2028"}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        context = {"indent": 4}
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context),
+        )
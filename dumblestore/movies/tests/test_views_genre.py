@@ -0,0 +1,90 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..bulk import bulk_create_movies
+from ..models import Genre, Movie
+from .factories import AdminFactory, CustomerUserFactory, MovieWithManyGenresFactory
+
+
+class GenreViewTests(APITestCase):
+    """
+    Test class to ensure the genre list is read-only and its movie counts follow every kind of genre change
+    """
+
+    def setUp(self):
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("genre-list")
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        self.horror = Genre.objects.create(name="Horror")
+        self.m1 = MovieWithManyGenresFactory(title="Both")
+        self.m1.genres.set([self.drama, self.comedy])
+        self.m2 = MovieWithManyGenresFactory(title="Drama only")
+        self.m2.genres.add(self.drama)
+
+    def counts(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return {genre["name"]: genre["movie_count"] for genre in resp.data}
+
+    def assertCountsAreExact(self):
+        expected = {genre.name: genre.genres.count() for genre in Genre.objects.all()}
+        self.assertEqual(self.counts(), expected)
+
+    def test_list_genres_with_counts(self):
+        # a single query, whatever the size of the catalog
+        with self.assertNumQueries(1):
+            counts = self.counts()
+        self.assertEqual(counts, {"Comedy": 1, "Drama": 2, "Horror": 0})
+
+    def test_counts_follow_movie_writes(self):
+        self.m1.genres.set([self.comedy, self.horror])
+        self.assertCountsAreExact()
+        # removing a genre the movie does not have changes nothing
+        self.m2.genres.remove(self.drama, self.horror)
+        self.assertCountsAreExact()
+        self.m1.genres.clear()
+        self.assertCountsAreExact()
+        self.m1.genres.add(self.drama)
+        self.m1.genres.add(self.drama)
+        self.m1.delete()
+        self.assertCountsAreExact()
+
+    def test_counts_follow_genre_side_writes(self):
+        self.horror.genres.add(self.m1, self.m2)
+        self.assertCountsAreExact()
+        self.drama.genres.remove(self.m1)
+        self.assertCountsAreExact()
+        self.drama.genres.clear()
+        self.assertCountsAreExact()
+
+    def test_counts_follow_api_and_bulk_writes(self):
+        self.client.force_authenticate(user=AdminFactory.create())
+        movie_url = reverse("movie-list")
+        resp = self.client.post(
+            movie_url, {"title": "New", "genres": ["Drama", "Western"]}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        bulk_create_movies([("Bulk 1", ["Horror"]), ("Bulk 2", ["Horror", "Drama"])])
+        self.assertCountsAreExact()
+        self.assertEqual(self.counts()["Drama"], 4)
+        Movie.objects.filter(title__startswith="Bulk").delete()
+        self.assertCountsAreExact()
+
+    def test_recount(self):
+        Genre.objects.update(movie_count=0)
+        Genre.objects.recount_movies()
+        self.assertCountsAreExact()
+
+    def test_genres_are_read_only(self):
+        self.client.force_authenticate(user=AdminFactory.create())
+        resp = self.client.post(self.url, {"name": "Western"})
+        self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        resp = self.client.delete(reverse("genre-detail", args=[self.drama.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_anonymous_access(self):
+        self.client.force_authenticate(user=None)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,14 +1,22 @@
 import json
+from base64 import urlsafe_b64encode
+from unittest import mock
 from urllib.parse import urljoin
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.views import View
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 from rest_framework import status
+from .. import cache as movie_cache
 from ..models import Genre, Movie
 from .factories import (
     AdminFactory,
     CustomerUserFactory,
     MovieWithManyGenresFactory,
+    RandomUserFactory,
 )
 
 
@@ -42,7 +50,7 @@ class MovieViewAdminTests(APITestCase):
         self.assertEqual(len(resp.data["results"]), 4)
 
     def test_admin_can_view_movies_with_pagination(self):
-        MovieWithManyGenresFactory.create_batch(100, genre_count=2)
+        MovieWithManyGenresFactory.create_bulk(100, genre_count=2)
         url = urljoin(self.url, "?page=3")
         resp = self.client.get(url)
         self.assertEqual(len(resp.data["results"]), 20)
@@ -114,6 +122,554 @@ class MovieViewAdminTests(APITestCase):
         self.assertEqual(resp.data["title"], "New Title")
 
 
+class MovieCacheInvalidationTests(APITestCase):
+    def setUp(self):
+        """
+        Creates or gets an admin user and warms the cache with a few movies
+        """
+        self.APIuser = AdminFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+
+        Genre.objects.create(name="Scifi")
+        Genre.objects.create(name="Drama")
+        self.m1 = MovieWithManyGenresFactory(genre_count=1)
+        self.m2 = MovieWithManyGenresFactory(genre_count=2)
+
+    def test_unrelated_cache_entries_survive_writes(self):
+        cache.set("unrelated", "still here")
+        data = {"title": "New Movie", "genres": ["Scifi", "Drama"]}
+        resp = self.client.post(self.url, data=data, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get("unrelated"), "still here")
+
+    def test_write_keeps_other_movie_details_cached(self):
+        m1_url = urljoin(self.url, self.m1.slug + "/")
+        resp = self.client.get(m1_url)
+        old_title = resp.data["title"]
+        # bypasses signals, so only a cache hit returns the old title
+        Movie.objects.filter(pk=self.m1.pk).update(title="Changed Behind The Scenes")
+
+        m2_url = urljoin(self.url, self.m2.slug + "/")
+        putData = {"title": "New Title", "genres": ["Scifi", "Comedy"]}
+        resp = self.client.put(m2_url, putData, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(m1_url)
+        self.assertEqual(resp.data["title"], old_title)
+        resp = self.client.get(m2_url)
+        self.assertEqual(resp.data["title"], "New Title")
+
+    def test_write_invalidates_once(self):
+        with mock.patch.object(
+            movie_cache, "_invalidate", wraps=movie_cache._invalidate
+        ) as invalidate:
+            data = {"title": "New Movie", "genres": ["Scifi", "Drama"]}
+            self.client.post(self.url, data=data, format="json")
+            self.assertEqual(invalidate.call_count, 1)
+
+            url = urljoin(self.url, self.m2.slug + "/")
+            putData = {"title": "New Title", "genres": ["Scifi"]}
+            self.client.put(url, putData, format="json")
+            self.assertEqual(invalidate.call_count, 2)
+
+
+class MovieSharedCacheTests(APITestCase):
+    def setUp(self):
+        """
+        Creates a customer user and a few movies. Creating movies invalidates the cached pages
+        """
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+
+        Genre.objects.create(name="Scifi")
+        self.m1 = MovieWithManyGenresFactory(title="Alien", genre_count=1)
+        self.m2 = MovieWithManyGenresFactory(title="Zardoz", genre_count=1)
+
+    def test_page_is_shared_between_customers(self):
+        first = self.client.get(self.url)
+        self.client.force_authenticate(user=RandomUserFactory.create())
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+
+    def test_detail_is_shared_between_customers(self):
+        url = urljoin(self.url, self.m1.slug + "/")
+        self.client.get(url)
+        self.client.force_authenticate(user=RandomUserFactory.create())
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp.data["title"], "Alien")
+
+    def test_cached_page_requires_authentication(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(user=None)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_entries_are_separated_by_ordering(self):
+        resp = self.client.get(urljoin(self.url, "?ordering=title"))
+        self.assertEqual(resp.data["results"][0]["title"], "Alien")
+        resp = self.client.get(urljoin(self.url, "?ordering=-title"))
+        self.assertEqual(resp.data["results"][0]["title"], "Zardoz")
+
+
+class MovieCursorPaginationTests(APITestCase):
+    def setUp(self):
+        """
+        Creates a customer user and a catalog spanning several pages with repeated genre combinations
+        """
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+
+        Genre.objects.create(name="Scifi")
+        Genre.objects.create(name="Drama")
+        Genre.objects.create(name="Comedy")
+        for i in range(45):
+            MovieWithManyGenresFactory(
+                title="Movie %02d" % i, genre_order_index=["Comedy", "Drama"][i % 2]
+            )
+
+    def walk(self, url, link="next"):
+        titles = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", resp.data)
+            page = [item["title"] for item in resp.data["results"]]
+            titles = titles + page if link == "next" else page + titles
+            url = resp.data[link]
+        return titles
+
+    def test_cursor_walks_every_ordering(self):
+        movies = list(Movie.objects.all())
+        by_title = lambda m: (m.title.lower(), m.pk)
+        by_genres = lambda m: (m.genre_order_index.lower(), m.pk)
+        expected = {
+            "title": [m.title for m in sorted(movies, key=by_title)],
+            "-title": [m.title for m in sorted(movies, key=by_title, reverse=True)],
+            "genres": [m.title for m in sorted(movies, key=by_genres)],
+            "-genres": [m.title for m in sorted(movies, key=by_genres, reverse=True)],
+        }
+        for ordering, titles in expected.items():
+            with self.subTest(ordering=ordering):
+                url = urljoin(self.url, "?cursor=&ordering=" + ordering)
+                self.assertListEqual(self.walk(url), titles)
+
+    def test_cursor_walks_backwards(self):
+        url = urljoin(self.url, "?cursor=")
+        while True:
+            resp = self.client.get(url)
+            if not resp.data["next"]:
+                break
+            url = resp.data["next"]
+        self.assertIsNone(resp.data["next"])
+        titles = self.walk(resp.data["previous"], link="previous")
+        titles += [item["title"] for item in resp.data["results"]]
+        self.assertListEqual(titles, ["Movie %02d" % i for i in range(45)])
+
+    def test_first_page_has_no_previous(self):
+        resp = self.client.get(urljoin(self.url, "?cursor="))
+        self.assertIsNone(resp.data["previous"])
+        self.assertEqual(len(resp.data["results"]), 20)
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(urljoin(self.url, "?cursor=notacursor"))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pk_out_of_range(self):
+        for pk in [2**63, -(2**63) - 1]:
+            cursor = urlsafe_b64encode(json.dumps(["movie", pk, False]).encode())
+            resp = self.client.get(self.url, {"cursor": cursor.decode()})
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MovieBulkImportTests(APITestCase):
+    def setUp(self):
+        """
+        Creates or gets an admin user and uses that to import movies
+        """
+        self.APIuser = AdminFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-bulk")
+        Genre.objects.create(name="Scifi")
+        self.alien = MovieWithManyGenresFactory(title="Alien", genre_count=1)
+
+    def batch(self, size, start=0):
+        return [
+            {"title": "Bulk Movie %d" % i, "genres": ["Scifi", "Genre %d" % (i % 3)]}
+            for i in range(start, start + size)
+        ]
+
+    def test_admin_can_import_movies(self):
+        resp = self.client.post(self.url, self.batch(50), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data), 50)
+        movie = Movie.objects.get(title="Bulk Movie 4")
+        self.assertEqual(resp.data[4]["slug"], movie.slug)
+        self.assertEqual(movie.slug, "bulk-movie-4")
+        self.assertEqual(movie.genre_order_index, "Genre 1|Scifi")
+        self.assertCountEqual(
+            [genre.name for genre in movie.genres.all()], ["Scifi", "Genre 1"]
+        )
+        self.assertEqual(Genre.objects.count(), 4)
+
+    def test_import_matches_single_create(self):
+        data = {"title": "The Matrix", "genres": ["Scifi", "Action"]}
+        self.client.post(reverse("movie-list"), data, format="json")
+        single = Movie.objects.get(title="The Matrix")
+        data = [{"title": "the matrix!", "genres": ["Scifi", "Action"]}]
+        self.client.post(self.url, data, format="json")
+        bulk = Movie.objects.get(title="the matrix!")
+        self.assertEqual(bulk.slug, "the-matrix-2")
+        self.assertEqual(bulk.genre_order_index, single.genre_order_index)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        for i in range(3):
+            Genre.objects.create(name="Genre %d" % i)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.batch(10), format="json")
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, self.batch(200, start=10), format="json")
+        self.assertEqual(len(small), len(large))
+
+    def test_errors_are_reported_per_item(self):
+        data = self.batch(3)
+        data[0]["title"] = "Alien"
+        data[1]["genres"] = []
+        data.append({"title": data[2]["title"], "genres": ["Scifi"]})
+        resp = self.client.post(self.url, data, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(resp.data), 4)
+        self.assertEqual(resp.data[0], {})
+        self.assertIn("genres", resp.data[1])
+        self.assertEqual(resp.data[2], {})
+        self.assertEqual(resp.data[3], {})
+
+        del data[1]
+        resp = self.client.post(self.url, data, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title", resp.data[0])
+        self.assertEqual(resp.data[1], {})
+        self.assertIn("title", resp.data[2])
+        self.assertEqual(Movie.objects.count(), 1)
+
+    def test_import_invalidates_list_cache(self):
+        list_url = reverse("movie-list")
+        resp = self.client.get(list_url)
+        self.assertEqual(resp.data["count"], 1)
+        self.client.post(self.url, self.batch(5), format="json")
+        resp = self.client.get(list_url)
+        self.assertEqual(resp.data["count"], 6)
+
+    def test_customer_can_not_import_movies(self):
+        self.client.force_authenticate(user=CustomerUserFactory.create())
+        resp = self.client.post(self.url, self.batch(5), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MovieExportTests(APITestCase):
+    def setUp(self):
+        """
+        Creates a customer user and a catalog that spans a few export chunks
+        """
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-export")
+
+        Genre.objects.create(name="Scifi")
+        Genre.objects.create(name="Drama")
+        Genre.objects.create(name="Comedy")
+        MovieWithManyGenresFactory.create_bulk(25, genre_count=2)
+
+    def api_rows(self):
+        rows = []
+        url = reverse("movie-list")
+        while url:
+            resp = self.client.get(url)
+            rows += resp.json()["results"]
+            url = resp.data["next"]
+        return sorted(rows, key=lambda row: row["title"])
+
+    def test_ndjson_export_matches_api(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(sorted(rows, key=lambda row: row["title"]), self.api_rows())
+
+    def test_csv_export(self):
+        resp = self.client.get(self.url, {"format": "csv"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "title,url,genres,slug")
+        self.assertEqual(len(lines), 26)
+        movie = Movie.objects.get(title=lines[1].split(",")[0])
+        genres = "|".join(genre.name for genre in movie.genres.all())
+        self.assertEqual(lines[1].split(",")[2], genres)
+
+    def test_export_reads_in_chunks(self):
+        with mock.patch("movies.views.MovieViewSet.export_chunk_size", 10):
+            resp = self.client.get(self.url)
+            # movies + genres for each of the 3 chunks, then the empty read
+            with self.assertNumQueries(7):
+                lines = b"".join(resp.streaming_content).splitlines()
+        self.assertEqual(len(lines), 25)
+
+    def test_anonymous_user_can_not_export(self):
+        self.client.force_authenticate(user=None)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class MovieSearchTests(APITestCase):
+    def setUp(self):
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+        for title in [
+            "Star Wars",
+            "Starship Troopers",
+            "The Lone Star",
+            "Wars of Stars",
+            "Amélie",
+        ]:
+            MovieWithManyGenresFactory(title=title)
+
+    def titles(self, query):
+        resp = self.client.get(urljoin(self.url, query))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in resp.data["results"]]
+
+    def test_title_prefix(self):
+        self.assertEqual(
+            self.titles("?title_prefix=star"), ["Star Wars", "Starship Troopers"]
+        )
+        self.assertEqual(self.titles("?title_prefix=STAR%20W"), ["Star Wars"])
+        self.assertEqual(self.titles("?title_prefix=x"), [])
+
+    def test_title_prefix_with_non_ascii_letters(self):
+        MovieWithManyGenresFactory(title="Élan")
+        self.assertEqual(self.titles("?title_prefix=%C3%89l"), ["Élan"])
+        self.assertEqual(self.titles("?title_prefix=am%C3%A9"), ["Amélie"])
+
+    def test_title_prefix_at_the_end_of_unicode(self):
+        # U+10FFFF has no next character, U+D7FF is followed by surrogates
+        for prefix in ["star%F4%8F%BF%BF", "%F4%8F%BF%BF", "star%ED%9F%BF"]:
+            with self.subTest(prefix=prefix):
+                self.assertEqual(self.titles("?title_prefix=" + prefix), [])
+
+    def test_search_matches_every_word_as_prefix(self):
+        self.assertEqual(
+            self.titles("?search=star"),
+            ["Star Wars", "Starship Troopers", "The Lone Star", "Wars of Stars"],
+        )
+        self.assertEqual(
+            self.titles("?search=wa%20sta"), ["Star Wars", "Wars of Stars"]
+        )
+        self.assertEqual(self.titles("?search=amelie"), ["Amélie"])
+
+    def test_search_input_is_not_parsed_as_query_syntax(self):
+        self.assertEqual(len(self.titles('?search="star"*(')), 4)
+        self.assertEqual(self.titles("?search=star OR troopers"), [])
+
+    def test_search_follows_writes(self):
+        movie = Movie.objects.get(title="Amélie")
+        movie.title = "Galaxy Quest"
+        movie.save()
+        self.assertEqual(self.titles("?search=galaxy"), ["Galaxy Quest"])
+        self.assertEqual(self.titles("?search=amelie"), [])
+        movie.delete()
+        self.assertEqual(self.titles("?search=galaxy"), [])
+
+    def test_search_combines_with_ordering_and_cursor(self):
+        self.assertEqual(
+            self.titles("?search=star&ordering=-title&cursor="),
+            ["Wars of Stars", "The Lone Star", "Starship Troopers", "Star Wars"],
+        )
+
+
+class MovieGenreFilterTests(APITestCase):
+    def setUp(self):
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+        genres = {
+            name: Genre.objects.create(name=name)
+            for name in ["Drama", "Comedy", "Horror"]
+        }
+        for title, names in [
+            ("Both", ["Drama", "Comedy"]),
+            ("Drama only", ["Drama"]),
+            ("Comedy only", ["Comedy"]),
+            ("All three", ["Drama", "Comedy", "Horror"]),
+            ("Horror only", ["Horror"]),
+        ]:
+            movie = MovieWithManyGenresFactory(title=title)
+            movie.genres.set([genres[name] for name in names])
+
+    def titles(self, query):
+        resp = self.client.get(urljoin(self.url, query))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in resp.data["results"]]
+
+    def test_all_mode_is_default(self):
+        self.assertEqual(
+            self.titles("?genre=Drama&genre=Comedy"), ["All three", "Both"]
+        )
+        self.assertEqual(
+            self.titles("?genre=Drama&genre=Comedy&genre_mode=all"),
+            ["All three", "Both"],
+        )
+        self.assertEqual(
+            self.titles("?genre=Drama&genre=Comedy&genre_mode=nonsense"),
+            ["All three", "Both"],
+        )
+
+    def test_any_mode(self):
+        self.assertEqual(
+            self.titles("?genre=Drama&genre=Comedy&genre_mode=any"),
+            ["All three", "Both", "Comedy only", "Drama only"],
+        )
+
+    def test_unknown_genre(self):
+        self.assertEqual(self.titles("?genre=Drama&genre=Western"), [])
+        self.assertEqual(
+            self.titles("?genre=Horror&genre=Western&genre_mode=any"),
+            ["All three", "Horror only"],
+        )
+
+    def test_repeated_parameters_are_cached_apart(self):
+        self.assertEqual(len(self.titles("?genre=Comedy")), 3)
+        self.assertEqual(
+            self.titles("?genre=Drama&genre=Comedy"), ["All three", "Both"]
+        )
+
+    def test_filter_follows_genre_changes(self):
+        self.assertEqual(self.titles("?genre=Horror"), ["All three", "Horror only"])
+        movie = Movie.objects.get(title="Both")
+        movie.genres.add(Genre.objects.get(name="Horror"))
+        self.assertEqual(
+            self.titles("?genre=Horror"), ["All three", "Both", "Horror only"]
+        )
+
+    def test_filter_combines_with_search_and_cursor(self):
+        self.assertEqual(
+            self.titles("?genre=Drama&search=only&cursor="), ["Drama only"]
+        )
+
+    def test_query_budget(self):
+        # count + page + genres, the genre subqueries are part of the page query
+        with self.assertNumQueries(3):
+            self.titles("?genre=Drama&genre=Comedy&genre=Horror")
+
+
+class MovieConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.APIuser = CustomerUserFactory.create()
+        self.client.force_authenticate(user=self.APIuser)
+        self.url = reverse("movie-list")
+        Genre.objects.create(name="Scifi")
+        self.m1 = MovieWithManyGenresFactory(title="Alien", genre_count=1)
+        self.m2 = MovieWithManyGenresFactory(title="Zardoz", genre_count=1)
+        self.detail_url = urljoin(self.url, self.m1.slug + "/")
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+        # no shared cache or database read, the version is in the local tier
+        with self.assertNumQueries(0), mock.patch.object(
+            cache, "get", wraps=cache.get
+        ) as get, override_settings(LOCAL_CACHE_CHECK_INTERVAL=60):
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.content, b"")
+        self.assertEqual(resp["ETag"], first["ETag"])
+        self.assertEqual(get.call_args_list, [])
+
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unchanged_detail_is_not_modified(self):
+        first = self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_detail_is_not_versioned(self):
+        url = urljoin(self.url, "missing/")
+        first = self.client.get(self.detail_url)
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(cache.get(movie_cache.DETAIL_VERSION_KEY % "missing"))
+
+    def test_writes_change_the_etag(self):
+        list_etag = self.client.get(self.url)["ETag"]
+        detail_etag = self.client.get(self.detail_url)["ETag"]
+        other_etag = self.client.get(urljoin(self.url, self.m2.slug + "/"))["ETag"]
+        self.m1.genres.clear()
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], list_etag)
+        resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["genres"], [])
+        resp = self.client.get(
+            urljoin(self.url, self.m2.slug + "/"), HTTP_IF_NONE_MATCH=other_etag
+        )
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_genre_renames_and_deletes_change_the_responses(self):
+        genre = self.m1.genres.get()
+        self.client.get(self.url)
+        self.client.get(self.detail_url)
+        genre.name = "Thriller"
+        genre.save()
+        self.assertIn(
+            "Thriller", self.client.get(self.url).data["results"][0]["genres"]
+        )
+        self.assertEqual(self.client.get(self.detail_url).data["genres"], ["Thriller"])
+        genre.delete()
+        self.assertEqual(self.client.get(self.url).data["results"][0]["genres"], [])
+        self.assertEqual(self.client.get(self.detail_url).data["genres"], [])
+
+    def test_writes_in_the_same_second_change_last_modified(self):
+        first = self.client.get(self.url)
+        before = movie_cache.version_time(movie_cache.list_version())
+        # the clock has not moved since the current version was made
+        with mock.patch.object(movie_cache.time, "time", return_value=before):
+            self.m1.genres.clear()
+        self.assertGreater(movie_cache.version_time(movie_cache.list_version()), before)
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_and_format(self):
+        etag = self.client.get(self.url)["ETag"]
+        for query in ["?ordering=-title", "?format=api"]:
+            with self.subTest(query=query):
+                resp = self.client.get(
+                    urljoin(self.url, query), HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_not_modified_requires_authentication(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.force_authenticate(user=None)
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_genre_changes_touch_updated_at(self):
+        before = Movie.objects.get(pk=self.m1.pk).updated_at
+        self.m1.genres.clear()
+        self.assertGreater(Movie.objects.get(pk=self.m1.pk).updated_at, before)
+
+
 class MovieCustomerViewTests(APITestCase):
     def setUp(self):
         """
@@ -157,7 +713,7 @@ class MovieCustomerViewTests(APITestCase):
         self.assertEqual(len(resp.data["results"]), 4)
 
     def test_customer_can_view_movies_with_pagination(self):
-        MovieWithManyGenresFactory.create_batch(100, genre_count=2)
+        MovieWithManyGenresFactory.create_bulk(100, genre_count=2)
         url = urljoin(self.url, "?page=3")
         resp = self.client.get(url)
         self.assertEqual(len(resp.data["results"]), 20)
@@ -17,7 +17,7 @@ class UsersTests(APITestCase):
         self.url = reverse("user-list")
 
         # populate it
-        RandomUserFactory.create(email="user1@hogwarts.com")
+        self.user1 = RandomUserFactory.create(email="user1@hogwarts.com")
         RandomUserFactory.create(email="user2@hogwarts.com")
         RandomUserFactory.create(email="user3@hogwarts.com")
 
@@ -26,8 +26,8 @@ class UsersTests(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_customers_cannot_view_user_details(self):
-        url = urljoin(self.url, "1/")
-        resp = self.client.get(self.url + "")
+        url = urljoin(self.url, "%d/" % self.user1.pk)
+        resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_customers_cannot_create_users(self):
@@ -48,11 +48,11 @@ class UsersTests(APITestCase):
             "password": "Asd1234!",
             "email": "voldi@voldecorp.com",
         }
-        resp = self.client.put(self.url + "2/", data=postData)
+        resp = self.client.put(self.url + "%d/" % self.user1.pk, data=postData)
         self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_customers_cannot_delete_users(self):
-        resp = self.client.delete(self.url + "2/")
+        resp = self.client.delete(self.url + "%d/" % self.user1.pk)
         self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_customers_can_view_own_details(self):
@@ -72,7 +72,7 @@ class AdminUserTests(APITestCase):
         self.url = reverse("user-list")
 
         # populate it
-        RandomUserFactory.create(email="user1@hogwarts.com")
+        self.user1 = RandomUserFactory.create(email="user1@hogwarts.com")
         RandomUserFactory.create(email="user2@hogwarts.com")
         RandomUserFactory.create(email="user3@hogwarts.com")
 
@@ -87,7 +87,7 @@ class AdminUserTests(APITestCase):
         self.assertEqual(len(resp.data["results"]), 20)
 
     def test_admin_can_view_user_details(self):
-        self.url = urljoin(self.url, "2/")
+        self.url = urljoin(self.url, "%d/" % self.user1.pk)
         resp = self.client.get(self.url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
 
@@ -103,7 +103,7 @@ class AdminUserTests(APITestCase):
         pass
 
     def test_admin_can_update_user(self):
-        self.url = urljoin(self.url, "2/")
+        self.url = urljoin(self.url, "%d/" % self.user1.pk)
         putData = {
             "email": "voldi@voldecorp.com",
             "first_name": "Lord",
@@ -114,6 +114,6 @@ class AdminUserTests(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
 
     def test_admin_can_delete_user(self):
-        self.url = urljoin(self.url, "2/")
+        self.url = urljoin(self.url, "%d/" % self.user1.pk)
         resp = self.client.delete(self.url)
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
@@ -1,12 +1,19 @@
 from cgitb import lookup
+from django.conf import settings
 from django.urls import include, path
-from .views import UserViewSet, MovieViewSet
+from .async_views import async_routes
+from .views import GenreViewSet, UserViewSet, MovieViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet)
 router.register(r"movies", MovieViewSet)
+router.register(r"genres", GenreViewSet)
+
+routes = router.urls
+if settings.ASYNC_READ_PATH:
+    routes = async_routes(routes)
 
 urlpatterns = [
-    path("", include(router.urls)),
+    path("", include(routes)),
 ]
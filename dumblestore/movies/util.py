@@ -34,11 +34,8 @@ def init_db():
             data=json.dumps(user),
         )
 
-    for movie in movies:
-        movie_req = (
-            requests.post(
-                f"{base_url}/api/movies/",
-                headers={"Authorization": token, "content-type": "application/json"},
-                data=json.dumps(movie),
-            ),
-        )
+    movie_req = requests.post(
+        f"{base_url}/api/movies/bulk/",
+        headers={"Authorization": token, "content-type": "application/json"},
+        data=json.dumps(movies),
+    )
@@ -1,16 +1,31 @@
-from .filters import GenreOrderingFilter
-from .models import User, Movie
-from .serializers import MovieSerializer, UserSerializer
-from rest_framework import viewsets, permissions
+import orjson
+from .cache import CatalogResponseCacheMixin
+from .filters import GenreFilter, GenreOrderingFilter, MovieSearchFilter
+from .materialize import ORDERINGS, materializer
+from .models import Genre, User, Movie
+from .export import EXPORT_FIELDS, iter_catalog
+from .pagination import MoviePagination
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer
+from .serializers import (
+    GenreSerializer,
+    MovieImportSerializer,
+    MovieSerializer,
+    UserSerializer,
+)
+from rest_framework import viewsets, permissions, status
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from .permissions import IsAuthenticatedReadOnly, IsOwner
 from django.contrib.auth.models import AnonymousUser
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
-from django.utils.decorators import method_decorator
-from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import patch_vary_headers
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -37,28 +52,176 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer_obj = self.get_serializer(instance=user)
         return Response(serializer_obj.data)
 
+    async def ame(self, request):
+        """
+        Async counterpart of me for the async read path, the user is loaded in a thread
+        """
+        user = await sync_to_async(User.objects.get)(pk=request.user.pk)
+        return Response(self.get_serializer(instance=user).data)
 
-class MovieViewSet(viewsets.ModelViewSet):
+
+class MovieViewSet(CatalogResponseCacheMixin, viewsets.ModelViewSet):
     """
     Api endpoint for the Movies. Admins have all the CRUD functionality. Customers can view movies and movie details
     Sorted on 'title' by default. Use '?ordering=genres', ?ordering=-genres', or '?ordering=-title' to change ordering.
+    Filter with '?search=star wa' (every word, word prefixes match) or '?title_prefix=star'.
+    Filter by genre with '?genre=Drama&genre=Comedy' (movies with both), add '&genre_mode=any' for either of them.
+    Paginated by page number, pass '?cursor=' to switch to cursor pagination which does not slow down on deep pages.
+    Admins can import many movies at once with a list of movies on '/bulk/'.
+    The whole catalog can be downloaded from '/export/', use '?format=csv' or '?format=ndjson' (default).
 
-    This view uses in memory cache.
+    This view uses in memory cache. Responses are cached after the permission checks and shared by every user,
+    entries are versioned so a write only invalidates the pages it affects.
     """
 
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.prefetch_related("genres")
     serializer_class = MovieSerializer
     permission_classes = [IsAuthenticatedReadOnly | permissions.IsAdminUser]
     lookup_field = "slug"
-    filter_backends = [GenreOrderingFilter]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = MoviePagination
+    filter_backends = [MovieSearchFilter, GenreFilter, GenreOrderingFilter]
     ordering_fields = ["title", "genres"]
     ordering = ["title"]
+    cache_query_params = [
+        "ordering",
+        "page",
+        "cursor",
+        "search",
+        "title_prefix",
+        "genre",
+        "genre_mode",
+    ]
+    max_bulk_size = 10000
+    export_chunk_size = 2000
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # responses are shared on the server but downstream HTTP caches must still tell tokens apart
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def prerendered_response(self, request, version):
+        """
+        Serves plain page number requests of the list from the pages kept by movies.materialize,
+        completing them with the count, the links and the origin of the urls
+        """
+        wanted = self.materialized_page(request)
+        if wanted is None:
+            return None
+        materialized = materializer.page(*wanted, version)
+        if materialized is None:
+            return None
+        return self.materialized_response(request, wanted[1], materialized)
+
+    async def aprerendered_response(self, request, version):
+        wanted = self.materialized_page(request)
+        if wanted is None:
+            return None
+        materialized = await materializer.apage(*wanted, version)
+        if materialized is None:
+            return None
+        return self.materialized_response(request, wanted[1], materialized)
+
+    def materialized_page(self, request):
+        """
+        Returns the (ordering, page) the request asks for, or None if it is not a plain page of the list
+        """
+        params = set(request.query_params) - {
+            "ordering",
+            "page",
+            api_settings.URL_FORMAT_OVERRIDE,
+        }
+        if (
+            self.action != "list"
+            or params
+            or self.format_kwarg
+            or not isinstance(request.accepted_renderer, FastJSONRenderer)
+            # pages are kept compact, e.g. Accept: application/json; indent=4 asks for indented ones
+            or request.accepted_renderer.get_indent(
+                request.accepted_media_type, self.get_renderer_context()
+            )
+        ):
+            return None
+        ordering = request.query_params.get("ordering") or None
+        page = request.query_params.get("page", "1")
+        if ordering not in ORDERINGS or not page.isdigit() or int(page) < 1:
+            return None
+        return ordering, int(page)
+
+    def materialized_response(self, request, page, materialized):
+        count, results = materialized
+        # same links as PageNumberPagination
+        url = request.build_absolute_uri()
+        last_page = max(1, -(-count // materializer.page_size))
+        next_url = (
+            replace_query_param(url, "page", page + 1) if page < last_page else None
+        )
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, "page")
+        else:
+            previous_url = replace_query_param(url, "page", page - 1)
+        origin = request.build_absolute_uri("/")[:-1].encode()
+        body = b'{"count":%d,"next":%s,"previous":%s,"results":%s}' % (
+            count,
+            orjson.dumps(next_url),
+            orjson.dumps(previous_url),
+            results.replace(b'"url":"/', b'"url":"' + origin + b"/"),
+        )
+        return HttpResponse(body, content_type=request.accepted_renderer.media_type)
+
+    def get_queryset(self):
+        # MovieListSerializer loads the genre names of a page itself, without building Genre objects
+        if self.action == "list":
+            return Movie.objects.all()
+        return super().get_queryset()
 
-    @method_decorator(cache_page(60 * 60))
-    @method_decorator(
-        vary_on_headers(
-            "Authorization",
+    @action(detail=False, methods=["post"], serializer_class=MovieImportSerializer)
+    def bulk(self, request):
+        """
+        Creates all the given movies in a single transaction, or none of them if any item is invalid
+        """
+        if isinstance(request.data, list) and len(request.data) > self.max_bulk_size:
+            raise ValidationError(
+                "A bulk import can contain at most %d movies." % self.max_bulk_size
+            )
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.save()
+        except IntegrityError:
+            # a concurrent write took one of the titles after validation
+            raise ValidationError("Some of the movies were created in the meantime.")
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Streams the whole catalog ordered by id. Rows are read and written in chunks so memory does not grow with it
+        """
+        renderer = request.accepted_renderer
+        url_prefix = request.build_absolute_uri(reverse("movie-list"))
+        rows = iter_catalog(url_prefix, self.export_chunk_size)
+        response = StreamingHttpResponse(
+            renderer.render_stream(rows, EXPORT_FIELDS),
+            content_type=request.accepted_media_type,
         )
-    )
-    def dispatch(self, request, *args, **kwargs):
-        return super().dispatch(request, *args, **kwargs)
+        response["Content-Disposition"] = 'attachment; filename="movies.%s"' % (
+            renderer.format
+        )
+        return response
+
+
+class GenreViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Api endpoint for the Genres with the number of movies in each of them, sorted by name. Read-only for everyone.
+    Counts are maintained on every change of the movie genres, listing them is a read of the genre table only.
+    Not paginated, the number of genres is small and clients use it as a whole for facets.
+    """
+
+    queryset = Genre.objects.all()
+    serializer_class = GenreSerializer
+    permission_classes = [IsAuthenticatedReadOnly | permissions.IsAdminUser]
+    pagination_class = None